@@ -0,0 +1,215 @@
+# ai_service.py
+# Lapisan permintaan AI: cache persisten ber-TTL, penggabungan permintaan identik yang sedang berjalan,
+# eksekusi di thread latar dengan timeout & retry, serta streaming teks parsial ke UI.
+
+import hashlib
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TTL_CACHE = 7 * 24 * 3600  # detik
+
+
+def build_recommendation_prompt(student_details, student_risk, key_factors):
+    """Membuat prompt rekomendasi intervensi untuk seorang siswa."""
+    return f"""TUGAS: Berdasarkan data siswa berikut, berikan rekomendasi intervensi yang konkret, personal, dan bisa ditindaklanjuti. Pisahkan dengan jelas rekomendasi untuk **Wali Kelas** dan **Guru BK**. DATA SISWA: - Nama: {student_details['Nama_Siswa']} - Kelas: {student_details['Kelas']} - Tingkat Risiko Prediksi: {student_risk['Tingkat Risiko (%)']:.2f}% - Faktor Risiko Utama yang Teridentifikasi: {', '.join(key_factors)} - Detail Data: Nilai Rata-Rata={student_details['Nilai_Rata_Rata_Semester']}, Jumlah Absensi={student_details['Jumlah_Absensi']} hari, Poin Pelanggaran={student_details['Riwayat_Pelanggaran']}, Pekerjaan Ortu={student_details['Pekerjaan_Orang_Tua']}. KONTEKS PERAN: Anda adalah seorang konselor sekolah dan psikolog pendidikan yang sangat berpengalaman. Gunakan bahasa yang empatik, profesional, dan positif. Format jawaban dalam bentuk poin-poin markdown."""
+
+
+def build_log_analysis_prompt(logs_df, student_name):
+    """Membuat prompt analisis riwayat log intervensi seorang siswa."""
+    log_string = logs_df.to_string(index=False)
+    return f"""TUGAS: Berdasarkan riwayat log intervensi berikut, berikan analisis singkat dalam 3 bagian: 1. Rangkuman Kondisi Siswa, 2. Identifikasi Tema/Pola, 3. Saran Fokus Intervensi Selanjutnya. RIWAYAT LOG INTERVENSI UNTUK SISWA BERNAMA {student_name}:\n{log_string}\n\nKONTEKS PERAN: Anda adalah seorang psikolog pendidikan senior. Gunakan bahasa yang profesional, to-the-point, dan format jawaban dalam bentuk markdown."""
+
+
+class GeminiBackend:
+    """Backend Google Generative AI (Gemini)."""
+
+    def __init__(self, api_key, model_name='gemini-1.5-flash'):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.name = model_name
+        self._model = genai.GenerativeModel(model_name)
+
+    def stream(self, prompt, timeout):
+        """Menghasilkan potongan teks respons secara bertahap."""
+        for chunk in self._model.generate_content(prompt, stream=True, request_options={'timeout': timeout}):
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend:
+    """Backend lokal tanpa API untuk pengujian dan pengembangan; mengembalikan teks tetap kata demi kata."""
+
+    def __init__(self, response="*Respons contoh dari backend lokal.*", delay=0.0, name='stub'):
+        self.name = name
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+
+    def stream(self, prompt, timeout):
+        self.calls += 1
+        for kata in self.response.split(' '):
+            if self.delay:
+                time.sleep(self.delay)
+            yield kata + ' '
+
+
+class RateLimiter:
+    """Pembatas laju token-bucket yang aman dipakai dari banyak thread."""
+
+    def __init__(self, per_menit, burst=1):
+        self.interval = 60.0 / per_menit
+        self.burst = burst
+        self._token = float(burst)
+        self._terakhir = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Menunggu hingga satu token tersedia, lalu memakainya."""
+        while True:
+            with self._lock:
+                sekarang = time.monotonic()
+                self._token = min(self.burst, self._token + (sekarang - self._terakhir) / self.interval)
+                self._terakhir = sekarang
+                if self._token >= 1:
+                    self._token -= 1
+                    return
+                tunggu = (1 - self._token) * self.interval
+            time.sleep(tunggu)
+
+
+class AIJob:
+    """Satu permintaan AI. Teks parsial bisa dibaca oleh beberapa pemanggil sekaligus lewat iter_text()."""
+
+    def __init__(self, key):
+        self.key = key
+        self.done = False
+        self.error = None
+        self._chunks = []
+        self._cond = threading.Condition()
+
+    @classmethod
+    def completed(cls, key, text):
+        job = cls(key)
+        job._chunks.append(text)
+        job.done = True
+        return job
+
+    def _append(self, text):
+        with self._cond:
+            self._chunks.append(text)
+            self._cond.notify_all()
+
+    def _finish(self, error=None):
+        with self._cond:
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    @property
+    def text(self):
+        with self._cond:
+            return ''.join(self._chunks)
+
+    def iter_text(self, timeout=60.0):
+        """Menghasilkan teks parsial begitu tersedia. Melempar TimeoutError jika tidak ada kemajuan selama timeout detik."""
+        posisi = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: len(self._chunks) > posisi or self.done, timeout=timeout):
+                    raise TimeoutError(f"Tidak ada respons AI dalam {timeout:.0f} detik.")
+                baru = self._chunks[posisi:]
+                posisi = len(self._chunks)
+                selesai, error = self.done, self.error
+            if baru:
+                yield ''.join(baru)
+            if selesai:
+                if error is not None:
+                    raise error
+                return
+
+    def result(self, timeout=60.0):
+        """Menunggu hingga selesai dan mengembalikan teks lengkap."""
+        for _ in self.iter_text(timeout):
+            pass
+        return self.text
+
+
+class AIService:
+    """Menjalankan permintaan AI di thread latar dengan cache persisten dan deduplikasi.
+
+    Hasil disimpan di tabel ai_cache dengan kunci hash prompt, sehingga menekan tombol yang sama
+    (atau rerun Streamlit) tidak memanggil API lagi selama TTL belum lewat. Permintaan identik yang
+    masih berjalan digabung menjadi satu AIJob.
+    """
+
+    def __init__(self, backend, pool, ttl=TTL_CACHE, max_workers=4, timeout=60.0, retries=3, backoff=1.0):
+        self.backend = backend
+        self.pool = pool
+        self.ttl = ttl
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sipandu-ai')
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def cache_key(self, prompt):
+        """Kunci cache: hash dari nama model dan prompt (prompt sepenuhnya ditentukan oleh input)."""
+        return hashlib.sha256(f"{self.backend.name}\n{prompt}".encode()).hexdigest()
+
+    def get_cached(self, key):
+        """Mengembalikan teks dari cache jika ada dan belum kedaluwarsa."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT response FROM ai_cache WHERE key = ? AND created_at >= ?", (key, time.time() - self.ttl)).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, key):
+        """Mengembalikan AIJob yang sedang berjalan atau sudah tersimpan untuk kunci ini, atau None."""
+        with self._lock:
+            job = self._inflight.get(key)
+        if job is not None:
+            return job
+        text = self.get_cached(key)
+        return AIJob.completed(key, text) if text is not None else None
+
+    def submit(self, prompt):
+        """Mengirim prompt ke backend di thread latar; mengembalikan AIJob (dari cache jika tersedia)."""
+        key = self.cache_key(prompt)
+        text = self.get_cached(key)
+        if text is not None:
+            return AIJob.completed(key, text)
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is None:
+                job = self._inflight[key] = AIJob(key)
+                self._executor.submit(self._run, job, prompt)
+        return job
+
+    def _run(self, job, prompt):
+        try:
+            for percobaan in range(self.retries):
+                try:
+                    for text in self.backend.stream(prompt, self.timeout):
+                        job._append(text)
+                    break
+                except Exception as e:
+                    # Retry hanya aman jika belum ada teks parsial yang terkirim ke UI
+                    if job._chunks or percobaan == self.retries - 1:
+                        job._finish(e)
+                        return
+                    time.sleep(self.backoff * 2 ** percobaan + random.uniform(0, self.backoff))
+            self._save(job.key, job.text)
+            job._finish()
+        except Exception as e:
+            job._finish(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(job.key, None)
+
+    def _save(self, key, text):
+        with self.pool.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO ai_cache (key, response, created_at) VALUES (?, ?, ?)", (key, text, time.time()))
+            conn.execute("DELETE FROM ai_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            conn.commit()
@@ -0,0 +1,61 @@
+# analytics.py
+# Agregasi dasbor analitik yang dihitung di SQLite dari skor risiko tersimpan.
+
+import pandas as pd
+
+import scoring
+
+DIMENSI = {'Kelas': 'Kelas', 'Pekerjaan Orang Tua': 'Pekerjaan_Orang_Tua'}
+
+# Kolom faktor risiko: (label, kondisi SQL) atas kontribusi model tersimpan. Ambang sama dengan scoring.key_factors,
+# sehingga setiap siswa dihitung pada faktor yang sama dengan yang tampil di profilnya.
+FAKTOR = [(label, f"r.{scoring.KOLOM_KONTRIBUSI[fitur]} >= {scoring.BATAS_KONTRIBUSI}") for fitur, label in scoring.FAKTOR_MODEL.items()]
+
+
+def _kolom_agregat():
+    faktor = ', '.join(f'SUM(r.risk_score >= :ambang AND {kondisi}) AS "{label}"' for label, kondisi in FAKTOR)
+    return f"""COUNT(*) AS jumlah_siswa, AVG(r.risk_score) AS rata_rata_risiko,
+               SUM(r.risk_score >= :ambang) AS berisiko_tinggi, {faktor}"""
+
+
+def _filter(filter_dimensi, filter_nilai):
+    if filter_dimensi is None:
+        return '', {}
+    return f"WHERE d.{DIMENSI[filter_dimensi]} = :filter_nilai", {'filter_nilai': filter_nilai}
+
+
+def school_summary(conn, ambang=scoring.AMBANG_RISIKO_TINGGI, filter_dimensi=None, filter_nilai=None):
+    """Ringkasan satu baris: jumlah siswa, rata-rata risiko, jumlah berisiko tinggi, dan jumlah per faktor risiko.
+
+    Faktor risiko hanya dihitung di antara siswa berisiko tinggi (risiko >= ambang).
+    """
+    where, params = _filter(filter_dimensi, filter_nilai)
+    row = pd.read_sql(f"SELECT {_kolom_agregat()} FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN {where}",
+                      conn, params={'ambang': ambang, **params}).iloc[0].fillna(0)
+    row['persen_berisiko_tinggi'] = row['berisiko_tinggi'] / row['jumlah_siswa'] if row['jumlah_siswa'] else 0.0
+    return row
+
+
+def risk_by_group(conn, dimensi, ambang=scoring.AMBANG_RISIKO_TINGGI, filter_dimensi=None, filter_nilai=None):
+    """Agregasi per nilai dimensi ('Kelas' atau 'Pekerjaan Orang Tua'), diurutkan dari rata-rata risiko tertinggi.
+
+    filter_dimensi/filter_nilai membatasi ke satu kelompok untuk drill-down, misalnya per pekerjaan orang tua di satu kelas.
+    """
+    kolom = DIMENSI[dimensi]
+    where, params = _filter(filter_dimensi, filter_nilai)
+    df = pd.read_sql(f"""SELECT d.{kolom} AS "{dimensi}", {_kolom_agregat()}
+                         FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN {where}
+                         GROUP BY d.{kolom} ORDER BY rata_rata_risiko DESC""",
+                     conn, params={'ambang': ambang, **params})
+    df['persen_berisiko_tinggi'] = df['berisiko_tinggi'] / df['jumlah_siswa']
+    return df.set_index(dimensi)
+
+
+def high_risk_students(conn, ambang=scoring.AMBANG_RISIKO_TINGGI, filter_dimensi=None, filter_nilai=None, limit=100):
+    """Daftar siswa berisiko tinggi (opsional dalam satu kelompok), diurutkan dari risiko tertinggi."""
+    where, params = _filter(filter_dimensi, filter_nilai)
+    where = f"{where} AND" if where else "WHERE"
+    return pd.read_sql(f"""SELECT d.Nama_Siswa, d.NISN, d.Kelas, d.Pekerjaan_Orang_Tua, r.risk_score AS "Tingkat Risiko (%)"
+                           FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN
+                           {where} r.risk_score >= :ambang ORDER BY r.risk_score DESC LIMIT :limit""",
+                       conn, params={'ambang': ambang, 'limit': limit, **params})
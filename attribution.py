@@ -0,0 +1,85 @@
+# attribution.py
+# Atribusi faktor risiko berbasis model: kontribusi setiap fitur mentah terhadap skor risiko seorang siswa,
+# dihitung untuk seluruh siswa sekaligus.
+
+import numpy as np
+
+from scoring import FAKTOR_MODEL
+
+# Jumlah siswa per panggilan model.apply; membatasi matriks indeks daun (siswa x jumlah pohon) per potongan
+UKURAN_POTONGAN = 16384
+
+
+def _daftar_pohon(model):
+    if hasattr(model, 'estimators_') and all(hasattr(e, 'tree_') for e in model.estimators_):
+        return [e.tree_ for e in model.estimators_]
+    if hasattr(model, 'tree_'):
+        return [model.tree_]
+    return None
+
+
+class ModelExplainer:
+    """Menghitung skor risiko dan kontribusi per fitur mentah (poin persen) untuk satu batch siswa.
+
+    Untuk model pohon (RandomForest/DecisionTree) dipakai kontribusi jalur pohon: setiap percabangan yang dilalui
+    seorang siswa menggeser probabilitas sebesar selisih nilai simpul anak dan induknya, dan pergeseran itu
+    dikreditkan ke fitur yang dipakai percabangan. Karena jalur ditentukan oleh daun yang dicapai, kontribusi
+    setiap daun dihitung sekali saat model dimuat; kontribusi seluruh siswa cukup model.apply lalu satu
+    pengambilan baris tabel per pohon. Skor = bias + jumlah kontribusi, tepat sama dengan predict_proba.
+
+    Model lain memakai substitusi: kontribusi sebuah fitur adalah penurunan skor bila kolomnya diganti rata-rata
+    batch, dihitung untuk semua fitur dalam satu panggilan predict_proba.
+    """
+
+    def __init__(self, model, encoder):
+        self.model = model
+        self.encoder = encoder
+        kolom = encoder.model_columns
+        # Matriks (kolom model x fitur mentah) yang menjumlahkan kolom one-hot Pekerjaan_Orang_Tua_* menjadi satu faktor
+        self._grup = np.zeros((len(kolom), len(FAKTOR_MODEL)))
+        for j, fitur in enumerate(FAKTOR_MODEL):
+            for i, nama in enumerate(kolom):
+                if nama == fitur or nama.startswith(f'{fitur}_'):
+                    self._grup[i, j] = 1
+        pohon = _daftar_pohon(model)
+        self._bias, self._tabel_daun = self._bangun_tabel(pohon, self._grup) if pohon else (None, None)
+
+    @staticmethod
+    def _bangun_tabel(pohon, grup):
+        """Bias (%) dan, per pohon, tabel (simpul x faktor) berisi kontribusi kumulatif dari akar sampai simpul itu."""
+        tabel, bias = [], 0.0
+        for tree in pohon:
+            value = tree.value[:, 0, :]
+            p = value[:, 1] / value.sum(axis=1)
+            kiri, kanan, fitur = tree.children_left, tree.children_right, tree.feature
+            kumulatif = np.zeros((tree.node_count, grup.shape[0]))
+            simpul = np.array([0])
+            # Diproses per kedalaman: setiap anak mewarisi kontribusi induknya ditambah pergeseran percabangan induk
+            while simpul.size:
+                simpul = simpul[kiri[simpul] >= 0]
+                for anak in (kiri[simpul], kanan[simpul]):
+                    kumulatif[anak] = kumulatif[simpul]
+                    kumulatif[anak, fitur[simpul]] += p[anak] - p[simpul]
+                simpul = np.concatenate([kiri[simpul], kanan[simpul]])
+            tabel.append(kumulatif @ grup * 100 / len(pohon))
+            bias += p[0]
+        return bias * 100 / len(pohon), tabel
+
+    def explain(self, df):
+        """Mengembalikan (skor risiko %, matriks kontribusi % dengan kolom sesuai urutan FAKTOR_MODEL)."""
+        X = self.encoder.transform(df)
+        if self._tabel_daun is not None:
+            kontribusi = np.zeros((len(X), self._grup.shape[1]))
+            for awal in range(0, len(X), UKURAN_POTONGAN):
+                daun = self.model.apply(X[awal:awal + UKURAN_POTONGAN]).reshape(-1, len(self._tabel_daun))
+                for t, tabel in enumerate(self._tabel_daun):
+                    kontribusi[awal:awal + UKURAN_POTONGAN] += tabel[daun[:, t]]
+            return self._bias + kontribusi.sum(axis=1), kontribusi
+
+        n, n_faktor = len(X), self._grup.shape[1]
+        X_substitusi = np.tile(X, (n_faktor + 1, 1))
+        for j in range(n_faktor):
+            kolom_faktor = self._grup[:, j] > 0
+            X_substitusi[(j + 1) * n:(j + 2) * n, kolom_faktor] = X[:, kolom_faktor].mean(axis=0)
+        proba = self.model.predict_proba(X_substitusi)[:, 1].reshape(n_faktor + 1, n) * 100
+        return proba[0], (proba[0] - proba[1:]).T
@@ -0,0 +1,81 @@
+# batch_rekomendasi.py
+# Pembuatan rekomendasi AI massal untuk seluruh siswa berisiko tinggi.
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+import scoring
+from ai_service import RateLimiter, build_recommendation_prompt
+
+
+def select_cohort(conn, ambang=scoring.AMBANG_RISIKO_TINGGI):
+    """Membaca data sumber, skor risiko, dan kontribusi faktor semua siswa dengan risiko >= ambang (persen)."""
+    kontribusi = ', '.join(f"r.{kolom}" for kolom in scoring.KOLOM_KONTRIBUSI.values())
+    return pd.read_sql(f"""SELECT d.*, r.risk_score AS "Tingkat Risiko (%)", {kontribusi}
+                          FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN
+                          WHERE r.risk_score >= ? ORDER BY r.risk_score DESC""", conn, params=(ambang,))
+
+
+def get_saved_recommendation(conn, nisn, input_hash, fingerprint):
+    """Mengembalikan rekomendasi tersimpan jika dibuat dari input dan model yang sama, atau None."""
+    row = conn.execute("SELECT rekomendasi FROM ai_rekomendasi WHERE NISN = ? AND input_hash = ? AND model_fingerprint = ?",
+                       (str(nisn), input_hash, fingerprint)).fetchone()
+    return row[0] if row else None
+
+
+def save_recommendation(conn, nisn, rekomendasi, input_hash, fingerprint):
+    """Menyimpan (atau mengganti) rekomendasi seorang siswa."""
+    conn.execute("INSERT OR REPLACE INTO ai_rekomendasi (NISN, rekomendasi, input_hash, model_fingerprint, created_at) VALUES (?, ?, ?, ?, ?)",
+                 (str(nisn), rekomendasi, input_hash, fingerprint, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+    conn.commit()
+
+
+def run_batch(ai, pool, fingerprint, ambang=scoring.AMBANG_RISIKO_TINGGI, max_workers=4, per_menit=60, timeout=120.0, on_progress=None):
+    """Membuat rekomendasi untuk semua siswa dengan risiko >= ambang secara paralel.
+
+    Siswa yang input prompt dan fingerprint modelnya tidak berubah sejak rekomendasi terakhir dilewati.
+    Jumlah pekerja dibatasi max_workers dan laju panggilan API dibatasi per_menit. on_progress dipanggil
+    dari thread pemanggil dengan dict statistik setiap kali satu siswa selesai.
+    Mengembalikan dict statistik akhir: total, dilewati, selesai, gagal, detik, per_menit.
+    """
+    with pool.connection() as conn:
+        df_cohort = select_cohort(conn, ambang)
+        tersimpan = dict(conn.execute("SELECT NISN, input_hash FROM ai_rekomendasi WHERE model_fingerprint = ?", (fingerprint,)).fetchall())
+
+    tugas = []
+    for _, siswa in df_cohort.iterrows():
+        prompt = build_recommendation_prompt(siswa, siswa, scoring.key_factors(siswa))
+        input_hash = ai.cache_key(prompt)
+        if tersimpan.get(str(siswa['NISN'])) != input_hash:
+            tugas.append((str(siswa['NISN']), prompt, input_hash))
+
+    stats = {'total': len(df_cohort), 'dilewati': len(df_cohort) - len(tugas), 'selesai': 0, 'gagal': 0, 'detik': 0.0, 'per_menit': 0.0}
+    limiter = RateLimiter(per_menit)
+    mulai = time.perf_counter()
+
+    def kerjakan(nisn, prompt, input_hash):
+        job = ai.lookup(input_hash)
+        if job is None:
+            # Hasil dari cache tidak memakai kuota API, jadi hanya panggilan baru yang menunggu token
+            limiter.acquire()
+            job = ai.submit(prompt)
+        rekomendasi = job.result(timeout)
+        with pool.connection() as conn:
+            save_recommendation(conn, nisn, rekomendasi, input_hash, fingerprint)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sipandu-batch') as executor:
+        futures = [executor.submit(kerjakan, *t) for t in tugas]
+        for future in as_completed(futures):
+            if future.exception() is None:
+                stats['selesai'] += 1
+            else:
+                stats['gagal'] += 1
+            stats['detik'] = time.perf_counter() - mulai
+            stats['per_menit'] = (stats['selesai'] + stats['gagal']) / stats['detik'] * 60
+            if on_progress is not None:
+                on_progress(dict(stats))
+    stats['detik'] = time.perf_counter() - mulai
+    return stats
@@ -0,0 +1,191 @@
+# bench_dasbor.py
+# Benchmark tanpa Streamlit untuk jalur-jalur utama dasbor pada sekolah sintetis (Faker) berukuran 1 ribu
+# sampai 500 ribu siswa beserta log intervensinya. Setiap tahap diukur sendiri-sendiri.
+#
+#   python benchmarks/bench_dasbor.py --ukuran 1000 10000 100000
+#   python benchmarks/bench_dasbor.py --ukuran 500000 --memori --csv hasil_bench.csv --label v1.4
+#   python benchmarks/bench_dasbor.py --ukuran 100000 --profil "refresh_scores (semua siswa)"
+
+import argparse
+import cProfile
+import csv
+import os
+import pstats
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+from faker import Faker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import analytics  # noqa: E402
+import daftar_siswa  # noqa: E402
+import export  # noqa: E402
+import model_artifact  # noqa: E402
+import scoring  # noqa: E402
+from attribution import ModelExplainer  # noqa: E402
+from database import get_connection, init_db, read_data, read_log_intervensi, update_data  # noqa: E402
+from encoding import FeatureEncoder  # noqa: E402
+from skema import PILIHAN_PEKERJAAN  # noqa: E402
+
+TINDAKAN = ["Konseling Individual", "Panggilan Orang Tua", "Bimbingan Belajar", "Kunjungan Rumah", "Lainnya"]
+
+
+def isi_database(conn, jumlah_siswa, log_per_siswa, seed=42):
+    """Mengisi database dengan sekolah sintetis: sekitar 36 siswa per rombel dan log intervensi sepanjang setahun.
+
+    Nama diambil dari kumpulan nama Faker (id_ID) yang dibuat sekali, karena memanggil Faker per siswa
+    mendominasi waktu pengisian untuk ratusan ribu siswa.
+    """
+    fake = Faker('id_ID')
+    Faker.seed(seed)
+    rng = random.Random(seed)
+    nama = [fake.name() for _ in range(min(jumlah_siswa, 5000))]
+    rombel = max(1, jumlah_siswa // (36 * 6))
+    kelas = [f"{tingkat} {jurusan} {nomor}" for tingkat in ("X", "XI", "XII") for jurusan in ("MIPA", "IPS") for nomor in range(1, rombel + 1)]
+    siswa = [(rng.choice(nama), str(1_000_000_000 + i), rng.choice(kelas), round(rng.uniform(40, 100), 2), rng.randint(0, 30),
+              rng.choice(["Ya", "Tidak"]), rng.choice(PILIHAN_PEKERJAAN), rng.randint(0, 100))
+             for i in range(jumlah_siswa)]
+    catatan = [fake.sentence(nb_words=12) for _ in range(500)]
+    guru = [fake.name() for _ in range(50)]
+    awal = datetime.now() - timedelta(days=365)
+    logs = [(str(1_000_000_000 + rng.randrange(jumlah_siswa)), (awal + timedelta(minutes=rng.randrange(365 * 24 * 60))).strftime('%Y-%m-%d %H:%M'),
+             rng.choice(TINDAKAN), rng.choice(catatan), rng.choice(guru))
+            for _ in range(jumlah_siswa * log_per_siswa)]
+    with conn:
+        conn.executemany("INSERT INTO data_siswa VALUES (?, ?, ?, ?, ?, ?, ?, ?)", siswa)
+        conn.executemany("INSERT INTO log_intervensi (nisn, tanggal, tindakan, catatan, dicatat_oleh) VALUES (?, ?, ?, ?, ?)", logs)
+
+
+def muat_model():
+    sumber = tuple(os.path.join(ROOT, p) for p in scoring.FILE_MODEL)
+    model, scaler, model_columns, _ = model_artifact.load_models(os.path.join(ROOT, model_artifact.FILE_ARTEFAK), sumber)
+    if model is None:
+        sys.exit("File model tidak ditemukan.")
+    encoder = FeatureEncoder(model_columns, scaler)
+    return model, encoder, ModelExplainer(model, encoder)
+
+
+def daftar_tahap(conn, model, encoder, explainer, tmp):
+    """Tahap-tahap yang diukur: (nama, fungsi tanpa argumen, jumlah ulangan). Persiapan dilakukan di luar fungsi."""
+    df_raw = read_data(conn)
+    X = encoder.transform(df_raw)
+    siswa_contoh = df_raw.iloc[0].to_dict()
+    rng = random.Random(7)
+    nisn_contoh = [str(n) for n in df_raw['NISN'].sample(200, replace=True, random_state=1)]
+    jumlah = len(df_raw)
+    kursor_dalam = conn.execute("SELECT risk_score, NISN FROM risk_score ORDER BY risk_score DESC, NISN LIMIT 1 OFFSET ?",
+                                (min(jumlah - 1, 100 * daftar_siswa.UKURAN_HALAMAN),)).fetchone()
+    df_halaman, _ = daftar_siswa.page_students(conn)
+    df_edit = df_halaman.copy()
+    df_edit.loc[df_edit.index[:5], 'Jumlah_Absensi'] += 1
+    fingerprint = ['bench-awal']
+
+    def skor_ulang_semua():
+        # Fingerprint baru membuat semua skor dianggap usang, seperti setelah model diganti
+        fingerprint[0] = f"bench-{time.perf_counter_ns()}"
+        scoring.refresh_scores(conn, explainer, fingerprint[0])
+
+    return [
+        ("read_data (seluruh tabel)", lambda: read_data(conn), 1),
+        ("FeatureEncoder.transform", lambda: encoder.transform(df_raw), 1),
+        ("predict_proba", lambda: model.predict_proba(X), 1),
+        ("ModelExplainer.explain", lambda: explainer.explain(df_raw), 1),
+        ("simulasi satu siswa", lambda: model.predict_proba(encoder.encode_one(siswa_contoh)), 200),
+        ("refresh_scores (semua siswa)", skor_ulang_semua, 1),
+        ("refresh_scores (tanpa perubahan)", lambda: scoring.refresh_scores(conn, explainer, fingerprint[0]), 5),
+        ("urut penuh di pandas (jalur lama)", lambda: pd.read_sql("SELECT d.Nama_Siswa, d.NISN, d.Kelas, r.risk_score FROM data_siswa d JOIN risk_score r ON r.NISN = d.NISN", conn).sort_values('risk_score', ascending=False), 1),
+        ("page_scores halaman pertama", lambda: daftar_siswa.page_scores(conn), 50),
+        ("page_scores halaman ke-100", lambda: daftar_siswa.page_scores(conn, setelah=kursor_dalam), 50),
+        ("page_scores cari nama", lambda: daftar_siswa.page_scores(conn, cari="Putri"), 5),
+        ("count_scores", lambda: daftar_siswa.count_scores(conn), 5),
+        ("get_student", lambda: daftar_siswa.get_student(conn, rng.choice(nisn_contoh)), 200),
+        ("school_summary", lambda: analytics.school_summary(conn), 3),
+        ("risk_by_group Kelas", lambda: analytics.risk_by_group(conn, 'Kelas'), 3),
+        ("risk_by_group Pekerjaan", lambda: analytics.risk_by_group(conn, 'Pekerjaan Orang Tua'), 3),
+        ("high_risk_students", lambda: analytics.high_risk_students(conn), 3),
+        ("risk_delta_since", lambda: scoring.risk_delta_since(conn, (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d %H:%M:%S')), 1),
+        ("update_data (5 baris di 1 halaman)", lambda: update_data(conn, df_halaman, df_edit), 5),
+        ("read_log_intervensi", lambda: read_log_intervensi(conn, rng.choice(nisn_contoh)), 200),
+        ("export_report xlsx", lambda: ekspor(conn, 'xlsx', tmp), 1),
+        ("export_report csv", lambda: ekspor(conn, 'csv', tmp), 1),
+    ]
+
+
+def ekspor(conn, fmt, tmp):
+    """Selalu menulis ulang file (tanpa cache), seperti unduhan pertama setelah data berubah."""
+    os.remove(export.export_report(conn, fmt, ('semua', None), 0, 'bench', cache_dir=tmp))
+
+
+def ukur(fungsi, ulang):
+    """Median waktu per panggilan (detik)."""
+    waktu = []
+    for _ in range(ulang):
+        mulai = time.perf_counter()
+        fungsi()
+        waktu.append(time.perf_counter() - mulai)
+    return statistics.median(waktu)
+
+
+def ukur_memori(fungsi):
+    """Puncak alokasi Python (tracemalloc) untuk satu panggilan, diukur terpisah agar tidak memperlambat pengukuran waktu."""
+    tracemalloc.start()
+    fungsi()
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return puncak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jalur utama dasbor SI PANDU tanpa Streamlit.")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=[1000, 10000, 100000], help="Jumlah siswa (hingga 500000)")
+    parser.add_argument('--log-per-siswa', type=int, default=2, help="Rata-rata jumlah log intervensi per siswa")
+    parser.add_argument('--memori', action='store_true', help="Ukur juga puncak memori tiap tahap (putaran kedua dengan tracemalloc)")
+    parser.add_argument('--profil', metavar='TAHAP', help="Jalankan cProfile untuk satu tahap pada ukuran terbesar")
+    parser.add_argument('--csv', help="Tambahkan hasil ke file CSV untuk membandingkan antarversi")
+    parser.add_argument('--label', default=datetime.now().strftime('%Y-%m-%d'), help="Label versi untuk baris CSV")
+    args = parser.parse_args()
+
+    model, encoder, explainer = muat_model()
+    hasil = []
+    print(f"{'Siswa':>8}  {'Tahap':<36} {'Waktu':>11} {'Puncak memori':>14}")
+    for jumlah in args.ukuran:
+        with tempfile.TemporaryDirectory() as tmp:
+            path_db = os.path.join(tmp, 'bench.db')
+            init_db(path_db)
+            conn = get_connection(path_db)
+            mulai = time.perf_counter()
+            isi_database(conn, jumlah, args.log_per_siswa)
+            scoring.refresh_scores(conn, explainer, 'bench-awal')
+            print(f"{jumlah:>8}  {'(pengisian data + skor awal)':<36} {time.perf_counter() - mulai:>10.2f}s")
+            for nama, fungsi, ulang in daftar_tahap(conn, model, encoder, explainer, tmp):
+                detik = ukur(fungsi, ulang)
+                puncak = ukur_memori(fungsi) if args.memori else None
+                teks_memori = f"{puncak / 2**20:>10.1f} MiB" if puncak is not None else f"{'-':>14}"
+                print(f"{jumlah:>8}  {nama:<36} {detik * 1000:>9.2f}ms {teks_memori}")
+                hasil.append({'label': args.label, 'siswa': jumlah, 'tahap': nama, 'ms': round(detik * 1000, 3),
+                              'puncak_mib': round(puncak / 2**20, 3) if puncak is not None else ''})
+                if args.profil == nama and jumlah == max(args.ukuran):
+                    profiler = cProfile.Profile()
+                    profiler.runcall(fungsi)
+                    pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+            conn.close()
+
+    if args.csv:
+        baru = not os.path.exists(args.csv)
+        with open(args.csv, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(hasil[0]))
+            if baru:
+                writer.writeheader()
+            writer.writerows(hasil)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# bench_export.py
+# Membandingkan waktu dan puncak memori ekspor laporan: jalur lama (DataFrame penuh -> ExcelWriter
+# ke BytesIO) versus export.py (XLSX write-only, CSV, Parquet yang ditulis per potongan).
+#
+#   python benchmarks/bench_export.py --ukuran 1000 10000 100000
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import export  # noqa: E402
+from database import get_connection, init_db  # noqa: E402
+
+
+def isi_database(conn, jumlah_siswa):
+    rng = random.Random(42)
+    siswa = [(f"Siswa {i}", str(1_000_000_000 + i), f"X-{i % 12 + 1}", round(rng.uniform(40, 100), 2), rng.randint(0, 30),
+              rng.choice(["Ya", "Tidak"]), rng.choice(["PNS", "Wiraswasta", "Buruh", "Petani", "Lainnya"]), rng.randint(0, 100))
+             for i in range(jumlah_siswa)]
+    skor = [(s[1], rng.uniform(0, 100), 0, 'bench', '2025-01-01 00:00:00') for s in siswa]
+    with conn:
+        conn.executemany("INSERT INTO data_siswa VALUES (?, ?, ?, ?, ?, ?, ?, ?)", siswa)
+        conn.executemany("INSERT INTO risk_score (NISN, risk_score, row_version, model_fingerprint, scored_at) VALUES (?, ?, ?, ?, ?)", skor)
+
+
+def ekspor_lama(conn, tmp):
+    """Meniru convert_df_to_excel: seluruh laporan dimuat ke DataFrame lalu workbook dibangun di memori."""
+    df = pd.read_sql("""SELECT d.Nama_Siswa, d.NISN, d.Kelas, r.risk_score AS "Tingkat Risiko (%)"
+                        FROM data_siswa d JOIN risk_score r ON r.NISN = d.NISN ORDER BY r.risk_score DESC""", conn)
+    output = BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name=export.NAMA_SHEET)
+    return len(output.getvalue())
+
+
+def ekspor_baru(fmt):
+    def jalankan(conn, tmp):
+        path = export.export_report(conn, fmt, ('semua', None), 1, 'bench', cache_dir=tmp)
+        ukuran = os.path.getsize(path)
+        os.remove(path)
+        return ukuran
+    return jalankan
+
+
+def ukur(fungsi, conn, tmp):
+    """Waktu diukur tanpa tracemalloc (yang memperlambat alokasi); puncak memori diukur pada putaran kedua."""
+    mulai = time.perf_counter()
+    ukuran = fungsi(conn, tmp)
+    detik = time.perf_counter() - mulai
+    tracemalloc.start()
+    fungsi(conn, tmp)
+    _, puncak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return detik, puncak, ukuran
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ekspor laporan risiko SI PANDU.")
+    parser.add_argument('--ukuran', type=int, nargs='+', default=[1000, 10000, 100000], help="Jumlah siswa yang diuji")
+    args = parser.parse_args()
+
+    skenario = [("convert_df_to_excel (lama)", ekspor_lama)] + [(f"export.py {fmt}", ekspor_baru(fmt)) for fmt in export.FORMAT]
+    print(f"{'Siswa':>8}  {'Jalur':<28} {'Waktu':>9} {'Puncak memori':>14} {'Ukuran file':>12}")
+    for jumlah in args.ukuran:
+        with tempfile.TemporaryDirectory() as tmp:
+            path_db = os.path.join(tmp, 'bench.db')
+            init_db(path_db)
+            conn = get_connection(path_db)
+            isi_database(conn, jumlah)
+            for nama, fungsi in skenario:
+                detik, puncak, ukuran = ukur(fungsi, conn, tmp)
+                print(f"{jumlah:>8}  {nama:<28} {detik:>8.2f}s {puncak / 2**20:>11.1f} MiB {ukuran / 2**20:>9.2f} MiB")
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+# bench_konkurensi.py
+# Simulasi N guru yang membaca dan mencatat log intervensi secara bersamaan.
+#
+# Membandingkan pola lama (koneksi baru per operasi, rollback journal, tanpa indeks)
+# dengan ConnectionPool (WAL + PRAGMA + indeks hasil migrasi).
+#
+#   python benchmarks/bench_konkurensi.py --guru 8 --siswa 20000 --durasi 5
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ConnectionPool, add_log_intervensi, init_db, read_log_intervensi  # noqa: E402
+
+TINDAKAN = ["Konseling Individual", "Panggilan Orang Tua", "Bimbingan Belajar", "Kunjungan Rumah", "Lainnya"]
+
+
+def isi_database(conn, jumlah_siswa, log_per_siswa):
+    """Mengisi database dengan siswa dan log intervensi sintetis."""
+    rng = random.Random(42)
+    siswa = [(f"Siswa {i}", str(1_000_000_000 + i), f"X-{i % 12 + 1}", round(rng.uniform(40, 100), 2), rng.randint(0, 30),
+              rng.choice(["Ya", "Tidak"]), rng.choice(["PNS", "Wiraswasta", "Buruh", "Petani", "Lainnya"]), rng.randint(0, 100))
+             for i in range(jumlah_siswa)]
+    awal = datetime(2025, 1, 1)
+    logs = [(str(1_000_000_000 + rng.randrange(jumlah_siswa)), (awal + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M'),
+             rng.choice(TINDAKAN), "Catatan sintetis", "Guru Benchmark")
+            for i in range(jumlah_siswa * log_per_siswa)]
+    with conn:
+        conn.executemany("INSERT INTO data_siswa VALUES (?, ?, ?, ?, ?, ?, ?, ?)", siswa)
+        conn.executemany("INSERT INTO log_intervensi (nisn, tanggal, tindakan, catatan, dicatat_oleh) VALUES (?, ?, ?, ?, ?)", logs)
+
+
+def buat_db_lama(path, jumlah_siswa, log_per_siswa):
+    conn = sqlite3.connect(path)
+    conn.execute("""CREATE TABLE data_siswa (Nama_Siswa TEXT, NISN TEXT PRIMARY KEY, Kelas TEXT, Nilai_Rata_Rata_Semester REAL, Jumlah_Absensi INTEGER, Status_Beasiswa TEXT, Pekerjaan_Orang_Tua TEXT, Riwayat_Pelanggaran INTEGER)""")
+    conn.execute("""CREATE TABLE log_intervensi (id INTEGER PRIMARY KEY AUTOINCREMENT, nisn TEXT NOT NULL, tanggal TEXT NOT NULL, tindakan TEXT NOT NULL, catatan TEXT, dicatat_oleh TEXT)""")
+    isi_database(conn, jumlah_siswa, log_per_siswa)
+    conn.close()
+
+
+def buat_db_baru(path, jumlah_siswa, log_per_siswa):
+    init_db(path)
+    conn = sqlite3.connect(path)
+    isi_database(conn, jumlah_siswa, log_per_siswa)
+    conn.close()
+
+
+def jalankan(pinjam, kembalikan, jumlah_guru, jumlah_siswa, durasi, rasio_tulis):
+    """Menjalankan beban kerja campuran dan mengembalikan latensi (detik) serta jumlah error."""
+    latensi, errors = [], []
+    lock = threading.Lock()
+    berhenti = time.perf_counter() + durasi
+
+    def guru(seed):
+        rng = random.Random(seed)
+        lokal, gagal = [], 0
+        while time.perf_counter() < berhenti:
+            nisn = str(1_000_000_000 + rng.randrange(jumlah_siswa))
+            mulai = time.perf_counter()
+            try:
+                conn = pinjam()
+                try:
+                    if rng.random() < rasio_tulis:
+                        add_log_intervensi(conn, {'nisn': nisn, 'tanggal': datetime.now().strftime('%Y-%m-%d %H:%M'), 'tindakan': rng.choice(TINDAKAN), 'catatan': "Benchmark", 'dicatat_oleh': f"Guru {seed}"})
+                    else:
+                        read_log_intervensi(conn, nisn)
+                finally:
+                    kembalikan(conn)
+                lokal.append(time.perf_counter() - mulai)
+            except sqlite3.OperationalError:
+                gagal += 1
+        with lock:
+            latensi.extend(lokal)
+            errors.append(gagal)
+
+    threads = [threading.Thread(target=guru, args=(i,)) for i in range(jumlah_guru)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return latensi, sum(errors)
+
+
+def laporan(nama, latensi, errors, durasi):
+    latensi = sorted(latensi)
+    p95 = latensi[int(len(latensi) * 0.95)] if latensi else float('nan')
+    median = statistics.median(latensi) if latensi else float('nan')
+    print(f"{nama:<28} {len(latensi) / durasi:>10.0f} op/s   p50 {median * 1000:>7.2f} ms   p95 {p95 * 1000:>7.2f} ms   error {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark konkurensi akses database SI PANDU.")
+    parser.add_argument('--guru', type=int, default=8, help="Jumlah guru (thread) yang bekerja bersamaan")
+    parser.add_argument('--siswa', type=int, default=20000)
+    parser.add_argument('--log-per-siswa', type=int, default=5)
+    parser.add_argument('--durasi', type=float, default=5.0, help="Durasi tiap skenario (detik)")
+    parser.add_argument('--rasio-tulis', type=float, default=0.2, help="Proporsi operasi yang mencatat log baru")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path_lama, path_baru = os.path.join(tmp, 'lama.db'), os.path.join(tmp, 'baru.db')
+        buat_db_lama(path_lama, args.siswa, args.log_per_siswa)
+        buat_db_baru(path_baru, args.siswa, args.log_per_siswa)
+        print(f"{args.guru} guru, {args.siswa} siswa, {args.siswa * args.log_per_siswa} log, {args.rasio_tulis:.0%} operasi tulis, {args.durasi:.0f} detik per skenario\n")
+
+        latensi, errors = jalankan(lambda: sqlite3.connect(path_lama, check_same_thread=False), lambda conn: conn.close(),
+                                   args.guru, args.siswa, args.durasi, args.rasio_tulis)
+        laporan("Koneksi baru, tanpa indeks", latensi, errors, args.durasi)
+
+        pool = ConnectionPool(path_baru, size=args.guru)
+        latensi, errors = jalankan(pool.acquire, pool.release, args.guru, args.siswa, args.durasi, args.rasio_tulis)
+        laporan("ConnectionPool + WAL", latensi, errors, args.durasi)
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
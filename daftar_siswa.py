@@ -0,0 +1,81 @@
+# daftar_siswa.py
+# Kueri tampilan daftar siswa: pencarian dan filter dijalankan di SQLite dengan paginasi keyset, sehingga
+# setiap halaman hanya membaca dan mengirim baris yang tampil, berapa pun jumlah siswanya.
+
+import pandas as pd
+
+import scoring
+
+UKURAN_HALAMAN = 50
+
+
+def _filter(cari=None, band=None):
+    """Kondisi WHERE untuk pencarian nama/kelas (mengandung), NISN (awalan), dan tingkat risiko dari scoring.BAND_RISIKO."""
+    kondisi, params = [], {}
+    if cari:
+        aman = cari.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        kondisi.append(r"(d.Nama_Siswa LIKE :pola ESCAPE '\' OR d.Kelas LIKE :pola ESCAPE '\' OR d.NISN LIKE :awalan ESCAPE '\')")
+        params.update(pola=f"%{aman}%", awalan=f"{aman}%")
+    if band is not None:
+        kondisi.append("r.risk_score >= :bawah AND r.risk_score < :atas")
+        params['bawah'], params['atas'] = scoring.BAND_RISIKO[band]
+    return kondisi, params
+
+
+def _where(kondisi):
+    return f"WHERE {' AND '.join(kondisi)}" if kondisi else ''
+
+
+def page_scores(conn, cari=None, band=None, setelah=None, ukuran=UKURAN_HALAMAN):
+    """Satu halaman daftar risiko, diurutkan dari risiko tertinggi.
+
+    setelah adalah kursor (risk_score, NISN) baris terakhir halaman sebelumnya, atau None untuk halaman pertama.
+    Mengembalikan (DataFrame, kursor halaman berikutnya atau None jika ini halaman terakhir).
+    """
+    kondisi, params = _filter(cari, band)
+    if setelah is not None:
+        # Syarat pertama berupa range pada indeks peringkat; syarat kedua memecah skor yang sama dengan NISN
+        kondisi.append("r.risk_score <= :skor AND (r.risk_score < :skor OR r.NISN > :nisn)")
+        params['skor'], params['nisn'] = setelah
+    df = pd.read_sql(f"""SELECT d.Nama_Siswa, d.NISN, d.Kelas, r.risk_score AS "Tingkat Risiko (%)"
+                         FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN {_where(kondisi)}
+                         ORDER BY r.risk_score DESC, r.NISN LIMIT :limit""", conn, params={**params, 'limit': ukuran + 1})
+    if len(df) <= ukuran:
+        return df, None
+    df = df.iloc[:ukuran]
+    return df, (float(df['Tingkat Risiko (%)'].iloc[-1]), df['NISN'].iloc[-1])
+
+
+def count_scores(conn, cari=None, band=None):
+    """Jumlah siswa bernilai risiko yang cocok dengan pencarian dan filter."""
+    kondisi, params = _filter(cari, band)
+    return conn.execute(f"SELECT COUNT(*) FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN {_where(kondisi)}", params).fetchone()[0]
+
+
+def page_students(conn, cari=None, setelah=None, ukuran=UKURAN_HALAMAN):
+    """Satu halaman data_siswa mentah untuk diedit, diurutkan per NISN. setelah adalah NISN baris terakhir halaman sebelumnya.
+
+    Mengembalikan (DataFrame, kursor halaman berikutnya atau None).
+    """
+    kondisi, params = _filter(cari)
+    if setelah is not None:
+        kondisi.append("d.NISN > :nisn")
+        params['nisn'] = setelah
+    df = pd.read_sql(f"SELECT d.* FROM data_siswa d {_where(kondisi)} ORDER BY d.NISN LIMIT :limit", conn, params={**params, 'limit': ukuran + 1})
+    if len(df) <= ukuran:
+        return df, None
+    df = df.iloc[:ukuran]
+    return df, df['NISN'].iloc[-1]
+
+
+def get_student(conn, nisn):
+    """Data sumber, skor risiko, dan kontribusi faktor seorang siswa berdasarkan NISN, atau None jika tidak ada."""
+    kontribusi = ', '.join(f"r.{kolom}" for kolom in scoring.KOLOM_KONTRIBUSI.values())
+    df = pd.read_sql(f"""SELECT d.*, r.risk_score AS "Tingkat Risiko (%)", {kontribusi}
+                         FROM data_siswa d JOIN risk_score r ON r.NISN = d.NISN WHERE d.NISN = ?""", conn, params=(str(nisn),))
+    return None if df.empty else df.iloc[0]
+
+
+def list_kelas(conn):
+    """Daftar kelas yang ada, dibaca dari indeks Kelas."""
+    return [row[0] for row in conn.execute("SELECT DISTINCT Kelas FROM data_siswa WHERE Kelas IS NOT NULL ORDER BY Kelas")]
@@ -2,12 +2,24 @@
 
 import streamlit as st
 import pandas as pd
-import joblib
-import numpy as np
 import sqlite3
-from datetime import datetime
-from io import BytesIO
-import google.generativeai as genai
+from datetime import datetime, timedelta
+import os
+
+import analytics
+import daftar_siswa
+import export
+import model_artifact
+from profil import ProfilRerun
+from attribution import ModelExplainer
+from encoding import FeatureEncoder
+import scoring
+from batch_rekomendasi import get_saved_recommendation, run_batch
+from ai_service import AIService, GeminiBackend, StubBackend, build_log_analysis_prompt, build_recommendation_prompt
+from database import (ConnectionPool, init_db, update_data, add_data, delete_data,
+                      add_log_intervensi, read_log_intervensi, delete_log_intervensi)
+from import_siswa import import_siswa
+from skema import KOLOM_DATA_SISWA, PILIHAN_BEASISWA, PILIHAN_PEKERJAAN
 
 # --- 1. Pengaturan Halaman dan Konfigurasi Awal ---
 st.set_page_config(
@@ -15,18 +27,9 @@ st.set_page_config(
     page_icon="🎓",
     layout="wide"
 )
-NAMA_FILE_DB = 'siswa.db'
 
 # --- 2. Konfigurasi & Fungsi-fungsi Inti ---
 
-# Konfigurasi Google Generative AI
-try:
-    genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
-    model_genai = genai.GenerativeModel('gemini-1.5-flash')
-    AI_ENABLED = True
-except Exception:
-    AI_ENABLED = False
-
 ### --- FUNGSI BARU: Pemeriksaan Password --- ###
 def check_password():
     """Mengembalikan True jika pengguna telah memasukkan password yang benar."""
@@ -54,111 +57,124 @@ def check_password():
     return False
 
 @st.cache_resource
-def load_models():
-    """Memuat model prediksi, scaler, dan daftar kolom dari file."""
-    try:
-        model = joblib.load('model_prediksi.pkl')
-        scaler = joblib.load('scaler.pkl')
-        model_columns = joblib.load('model_columns.pkl')
-        return model, scaler, model_columns
-    except FileNotFoundError:
-        return None, None, None
-
-def get_connection():
-    """Membuat koneksi ke database SQLite."""
-    return sqlite3.connect(NAMA_FILE_DB, check_same_thread=False)
-
-def init_db():
-    """Memastikan semua tabel yang dibutuhkan ada di database."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""CREATE TABLE IF NOT EXISTS data_siswa (Nama_Siswa TEXT, NISN TEXT PRIMARY KEY, Kelas TEXT, Nilai_Rata_Rata_Semester REAL, Jumlah_Absensi INTEGER, Status_Beasiswa TEXT, Pekerjaan_Orang_Tua TEXT, Riwayat_Pelanggaran INTEGER)""")
-    cursor.execute("""CREATE TABLE IF NOT EXISTS log_intervensi (id INTEGER PRIMARY KEY AUTOINCREMENT, nisn TEXT NOT NULL, tanggal TEXT NOT NULL, tindakan TEXT NOT NULL, catatan TEXT, dicatat_oleh TEXT, FOREIGN KEY (nisn) REFERENCES data_siswa(NISN))""")
-    conn.commit()
-    conn.close()
-
-def read_data(conn, query='SELECT * FROM data_siswa'):
-    """Membaca data siswa dari database."""
-    return pd.read_sql(query, conn)
-
-def update_data(conn, df_edited):
-    """Menyimpan DataFrame yang sudah diedit ke database."""
-    df_edited.to_sql('data_siswa', conn, if_exists='replace', index=False)
-
-def add_data(conn, data_baru):
-    """Menambahkan siswa baru ke database."""
-    query = "INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas, Nilai_Rata_Rata_Semester, Jumlah_Absensi, Status_Beasiswa, Pekerjaan_Orang_Tua, Riwayat_Pelanggaran) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
-    cursor = conn.cursor()
-    cursor.execute(query, tuple(data_baru.values()))
-    conn.commit()
-
-def delete_data(conn, nisn_list):
-    """Menghapus siswa dari database berdasarkan NISN."""
-    query = "DELETE FROM data_siswa WHERE NISN IN ({seq})".format(seq=','.join(['?']*len(nisn_list)))
-    cursor = conn.cursor()
-    cursor.execute(query, nisn_list)
-    conn.commit()
-
-def add_log_intervensi(conn, log_data):
-    """Menambahkan catatan log intervensi baru."""
-    query = "INSERT INTO log_intervensi (nisn, tanggal, tindakan, catatan, dicatat_oleh) VALUES (?, ?, ?, ?, ?)"
-    cursor = conn.cursor()
-    cursor.execute(query, tuple(log_data.values()))
-    conn.commit()
-
-def read_log_intervensi(conn, nisn):
-    """Membaca riwayat log intervensi untuk seorang siswa."""
-    return pd.read_sql("SELECT id, tanggal, tindakan, catatan, dicatat_oleh FROM log_intervensi WHERE nisn = ? ORDER BY tanggal DESC", conn, params=(nisn,))
-
-def delete_log_intervensi(conn, log_id):
-    """Menghapus satu catatan log intervensi berdasarkan ID uniknya."""
-    query = "DELETE FROM log_intervensi WHERE id = ?"
-    cursor = conn.cursor()
-    cursor.execute(query, (log_id,))
-    conn.commit()
-
-@st.cache_data
-def convert_df_to_excel(df):
-    """Mengonversi DataFrame ke format file Excel untuk di-download."""
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Laporan Risiko Siswa')
-    return output.getvalue()
-
-def generate_ai_recommendations(student_details, student_risk, key_factors):
-    """Membuat prompt dan memanggil AI untuk rekomendasi intervensi."""
-    prompt = f"""TUGAS: Berdasarkan data siswa berikut, berikan rekomendasi intervensi yang konkret, personal, dan bisa ditindaklanjuti. Pisahkan dengan jelas rekomendasi untuk **Wali Kelas** dan **Guru BK**. DATA SISWA: - Nama: {student_details['Nama_Siswa']} - Kelas: {student_details['Kelas']} - Tingkat Risiko Prediksi: {student_risk['Tingkat Risiko (%)']:.2f}% - Faktor Risiko Utama yang Teridentifikasi: {', '.join(key_factors)} - Detail Data: Nilai Rata-Rata={student_details['Nilai_Rata_Rata_Semester']}, Jumlah Absensi={student_details['Jumlah_Absensi']} hari, Poin Pelanggaran={student_details['Riwayat_Pelanggaran']}, Pekerjaan Ortu={student_details['Pekerjaan_Orang_Tua']}. KONTEKS PERAN: Anda adalah seorang konselor sekolah dan psikolog pendidikan yang sangat berpengalaman. Gunakan bahasa yang empatik, profesional, dan positif. Format jawaban dalam bentuk poin-poin markdown."""
-    try:
-        response = model_genai.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"Terjadi kesalahan saat menghubungi AI: {e}"
+def load_models(files_fingerprint):
+    """Memuat model prediksi, FeatureEncoder dan ModelExplainer-nya, serta info pemuatan (format, fingerprint, ukuran, waktu muat).
+
+    Mengutamakan artefak tunggal model_sipandu.joblib (lihat model_artifact.py). Argumen files_fingerprint
+    membuat cache dimuat ulang otomatis ketika file model berubah.
+    """
+    model, scaler, model_columns, info = model_artifact.load_models()
+    if model is None:
+        return None, None, None, None
+    encoder = FeatureEncoder(model_columns, scaler)
+    return model, encoder, ModelExplainer(model, encoder), info
+
+@st.cache_resource
+def get_pool():
+    """Menjalankan migrasi skema sekali per proses dan membuat pool koneksi yang dipakai bersama semua sesi."""
+    init_db()
+    return ConnectionPool()
+
+@st.cache_resource
+def get_ai_service():
+    """Membuat layanan AI bersama. Mengembalikan None jika API Key tidak tersedia.
 
-def analyze_intervention_logs(logs_df, student_name):
-    """Membuat prompt dan memanggil AI untuk analisis log intervensi."""
-    log_string = logs_df.to_string(index=False)
-    prompt = f"""TUGAS: Berdasarkan riwayat log intervensi berikut, berikan analisis singkat dalam 3 bagian: 1. Rangkuman Kondisi Siswa, 2. Identifikasi Tema/Pola, 3. Saran Fokus Intervensi Selanjutnya. RIWAYAT LOG INTERVENSI UNTUK SISWA BERNAMA {student_name}:\n{log_string}\n\nKONTEKS PERAN: Anda adalah seorang psikolog pendidikan senior. Gunakan bahasa yang profesional, to-the-point, dan format jawaban dalam bentuk markdown."""
+    Set SIPANDU_AI_BACKEND=stub untuk memakai backend lokal tanpa memanggil API.
+    """
+    if os.environ.get('SIPANDU_AI_BACKEND') == 'stub':
+        backend = StubBackend()
+    else:
+        try:
+            backend = GeminiBackend(st.secrets["GOOGLE_API_KEY"])
+        except Exception:
+            return None
+    return AIService(backend, get_pool())
+
+KONFIGURASI_KOLOM_ANALITIK = {
+    'jumlah_siswa': st.column_config.NumberColumn("Jumlah Siswa"),
+    'rata_rata_risiko': st.column_config.NumberColumn("Rata-rata Risiko", format="%.2f%%"),
+    'berisiko_tinggi': st.column_config.NumberColumn("Berisiko Tinggi"),
+    'persen_berisiko_tinggi': st.column_config.ProgressColumn("Porsi Berisiko Tinggi", format="percent", min_value=0, max_value=1),
+}
+
+# Hasil analitik di-cache per versi data dan fingerprint model; keduanya berubah setiap kali skor tersimpan berubah.
+@st.cache_data(max_entries=64)
+def cached_school_summary(_conn, data_version, fingerprint):
+    return analytics.school_summary(_conn)
+
+@st.cache_data(max_entries=64)
+def cached_risk_by_group(_conn, data_version, fingerprint, dimensi, filter_dimensi=None, filter_nilai=None):
+    return analytics.risk_by_group(_conn, dimensi, filter_dimensi=filter_dimensi, filter_nilai=filter_nilai)
+
+@st.cache_data(max_entries=64)
+def cached_high_risk_students(_conn, data_version, fingerprint, filter_dimensi, filter_nilai):
+    return analytics.high_risk_students(_conn, filter_dimensi=filter_dimensi, filter_nilai=filter_nilai)
+
+@st.cache_data(max_entries=64)
+def cached_count_scores(_conn, data_version, fingerprint, cari, band):
+    return daftar_siswa.count_scores(_conn, cari, band)
+
+@st.cache_data(max_entries=64)
+def cached_risk_delta_since(_conn, data_version, fingerprint, sejak):
+    return scoring.risk_delta_since(_conn, sejak)
+
+def halaman_aktif(key, filter_aktif):
+    """Kursor awal halaman yang sedang dibuka; kembali ke halaman pertama jika pencarian/filter berubah."""
+    state = st.session_state.setdefault(key, {'filter': filter_aktif, 'kursor': [None]})
+    if state['filter'] != filter_aktif:
+        state.update(filter=filter_aktif, kursor=[None])
+    return state['kursor'][-1]
+
+def navigasi_halaman(key, berikutnya):
+    """Tombol sebelumnya/berikutnya; riwayat kursor disimpan di session_state karena paginasi keyset hanya maju."""
+    state = st.session_state[key]
+    col_sebelumnya, col_info, col_berikutnya = st.columns([1, 3, 1], vertical_alignment="center")
+    if col_sebelumnya.button("◀ Sebelumnya", key=f"{key}_sebelumnya", disabled=len(state['kursor']) == 1):
+        state['kursor'].pop()
+        st.rerun()
+    col_info.caption(f"Halaman {len(state['kursor'])}")
+    if col_berikutnya.button("Berikutnya ▶", key=f"{key}_berikutnya", disabled=berikutnya is None):
+        state['kursor'].append(berikutnya)
+        st.rerun()
+
+def render_ai_job(job):
+    """Menampilkan hasil AI: langsung jika sudah selesai, atau di-stream selama masih berjalan."""
     try:
-        response = model_genai.generate_content(prompt)
-        return response.text
+        if job.done:
+            st.markdown(job.result())
+        else:
+            st.write_stream(job.iter_text())
     except Exception as e:
-        return f"Terjadi kesalahan saat menghubungi AI: {e}"
+        st.error(f"Terjadi kesalahan saat menghubungi AI: {e}")
 
 # --- 5. EKSEKUSI UTAMA APLIKASI ---
-def main():
+def main(conn):
     """Fungsi utama untuk menjalankan seluruh alur aplikasi Streamlit."""
     
-    # Inisialisasi dan Muat Aset
-    init_db() 
-    model, scaler, model_columns = load_models()
-    conn = get_connection()
+    # Panel waktu & memori per tahap, hanya jika SIPANDU_PROFIL=1
+    profil = ProfilRerun()
+
+    # Muat Aset (koneksi dipinjam dari pool oleh pemanggil)
+    try:
+        with profil.tahap("Memuat model"):
+            model, encoder, explainer, info_model = load_models(model_artifact.files_fingerprint())
+    except ValueError as e:
+        st.error(f"File model tidak sesuai dengan aplikasi: {e}")
+        st.stop()
+    ai_service = get_ai_service()
+    ai_enabled = ai_service is not None
 
     if model is None:
         st.error("File model tidak ditemukan! Harap jalankan skrip '2_latih_model.py' terlebih dahulu.")
         st.stop()
+    fingerprint = info_model['fingerprint']
+
+    # Hanya siswa yang baru/berubah (atau semua siswa jika file model berubah) yang dihitung ulang
+    with profil.tahap("Memperbarui skor"):
+        scoring.refresh_scores(conn, explainer, fingerprint)
 
     # --- Render Sidebar ---
-    with st.sidebar:
+    with st.sidebar, profil.tahap("Sidebar & simulasi"):
         try:
             st.image("https://man3medan.sch.id/wp-content/uploads/2023/11/MAN-3-Kota-Medan-1.png", width=200)
         except Exception:
@@ -166,8 +182,9 @@ def main():
             
         st.title("🎓 SI PANDU - AI")
         st.write("Sistem Peringatan Dini dan Dukungan Siswa")
-        if not AI_ENABLED:
+        if not ai_enabled:
             st.warning("Fitur AI nonaktif. Periksa API Key di .streamlit/secrets.toml")
+        st.caption(f"Model: {info_model['format']}, {info_model['ukuran'] / 1024:.0f} KB, dimuat dalam {info_model['detik'] * 1000:.0f} ms")
         
         st.divider()
         
@@ -175,13 +192,11 @@ def main():
             nilai = st.slider('Nilai Rata-Rata Semester', 0.0, 100.0, 75.5, 0.5)
             absensi = st.slider('Jumlah Absensi', 0, 30, 5)
             beasiswa = st.selectbox('Menerima Beasiswa?', ('Ya', 'Tidak'), key='beasiswa_sidebar')
-            pekerjaan = st.selectbox('Pekerjaan Orang Tua', ('PNS', 'Wiraswasta', 'Buruh', 'Petani', 'Lainnya'), key='pekerjaan_sidebar')
+            pekerjaan = st.selectbox('Pekerjaan Orang Tua', PILIHAN_PEKERJAAN, key='pekerjaan_sidebar')
             pelanggaran = st.slider('Total Poin Pelanggaran', 0, 100, 10)
+            siswa_simulasi = {'Nilai_Rata_Rata_Semester': nilai, 'Jumlah_Absensi': absensi, 'Status_Beasiswa': beasiswa, 'Pekerjaan_Orang_Tua': pekerjaan, 'Riwayat_Pelanggaran': pelanggaran}
             if st.button('Jalankan Simulasi Risiko'):
-                data_simulasi = {'Nilai_Rata_Rata_Semester': nilai, 'Jumlah_Absensi': absensi, 'Status_Beasiswa': 1 if beasiswa == 'Ya' else 0, 'Riwayat_Pelanggaran': pelanggaran, 'Pekerjaan_Orang_Tua_Buruh': 1 if pekerjaan == 'Buruh' else 0, 'Pekerjaan_Orang_Tua_Lainnya': 1 if pekerjaan == 'Lainnya' else 0, 'Pekerjaan_Orang_Tua_PNS': 1 if pekerjaan == 'PNS' else 0, 'Pekerjaan_Orang_Tua_Petani': 1 if pekerjaan == 'Petani' else 0, 'Pekerjaan_Orang_Tua_Wiraswasta': 1 if pekerjaan == 'Wiraswasta' else 0}
-                df_simulasi = pd.DataFrame(data_simulasi, index=[0])[model_columns]
-                scaled_simulasi = scaler.transform(df_simulasi)
-                pred_proba_simulasi = model.predict_proba(scaled_simulasi)
+                pred_proba_simulasi = model.predict_proba(encoder.encode_one(siswa_simulasi))
                 risk_score_simulasi = pred_proba_simulasi[0][1] * 100
                 st.subheader("Hasil Simulasi")
                 if risk_score_simulasi >= 75: st.error('**TINGKAT TINGGI / PRIORITAS UTAMA** 🔴')
@@ -189,53 +204,54 @@ def main():
                 elif risk_score_simulasi >= 25: st.info('**TINGKAT WASPADA** 🟡')
                 else: st.success('**TINGKAT AMAN** 🟢')
                 st.metric(label="Tingkat Keyakinan Risiko", value=f"{risk_score_simulasi:.2f}%")
+                # Grid dihitung hanya saat simulasi dijalankan, bukan pada setiap rerun halaman
+                st.caption("Risiko jika jumlah absensi dan nilai berubah (input lain tetap):")
+                df_sweep = encoder.sweep(model, siswa_simulasi, 'Jumlah_Absensi', range(0, 31), 'Nilai_Rata_Rata_Semester', sorted({50.0, 60.0, 70.0, 80.0, 90.0, nilai}))
+                st.line_chart(df_sweep.T.rename(columns=lambda n: f"Nilai {n:g}"), x_label='Jumlah Absensi', y_label='Risiko (%)')
         st.divider()
         st.info("Aplikasi ini dikembangkan untuk SOBAT Competition 2025.")
 
     # --- Render Tampilan Utama dengan Tabs ---
     st.title("Sistem Prediksi dan Intervensi Siswa MAN 3 Medan")
     
-    df_siswa = read_data(conn)
-    if not df_siswa.empty:
-        df_identitas = df_siswa[['Nama_Siswa', 'NISN', 'Kelas']].copy()
-        df_features_raw = df_siswa.drop(columns=['Nama_Siswa', 'NISN', 'Kelas'])
-        df_features = df_features_raw.copy()
-        df_features['Status_Beasiswa'] = df_features['Status_Beasiswa'].map({'Ya': 1, 'Tidak': 0})
-        df_features = pd.get_dummies(df_features, columns=['Pekerjaan_Orang_Tua'])
-        for col in model_columns:
-            if col not in df_features.columns: df_features[col] = 0
-        df_features = df_features[model_columns]
-        scaled_features = scaler.transform(df_features)
-        prediction_proba = model.predict_proba(scaled_features)
-        risk_scores = prediction_proba[:, 1] * 100
-        df_hasil = df_identitas
-        df_hasil['Tingkat Risiko (%)'] = risk_scores
-        df_hasil_sorted = df_hasil.sort_values(by='Tingkat Risiko (%)', ascending=False).reset_index(drop=True)
-        df_hasil_sorted.index = df_hasil_sorted.index + 1
-    else:
-        df_hasil_sorted = pd.DataFrame()
+    data_version = scoring.get_data_version(conn)
 
     tab_prediksi, tab_analitik, tab_admin = st.tabs(["📊 Dasbor Prediksi Risiko", "📈 Dasbor Analitik Sekolah", "⚙️ Manajemen Data & Intervensi"])
 
-    with tab_prediksi:
+    with tab_prediksi, profil.tahap("Tab prediksi"):
         st.header("Laporan Prediksi Risiko Putus Sekolah")
-        if df_hasil_sorted.empty:
+        if cached_count_scores(conn, data_version, fingerprint, '', None) == 0:
             st.warning("Database siswa kosong. Silakan tambahkan data di tab 'Manajemen Data & Intervensi'.")
         else:
-            excel_file = convert_df_to_excel(df_hasil_sorted)
-            st.download_button(label="📥 Download Laporan sebagai Excel", data=excel_file, file_name=f"laporan_risiko_siswa_{datetime.now().strftime('%Y%m%d')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-            st.dataframe(df_hasil_sorted.style.background_gradient(cmap='Reds', subset=['Tingkat Risiko (%)']).format({'Tingkat Risiko (%)': "{:.2f}%"}), use_container_width=True)
+            col_format, col_lingkup, col_unduh = st.columns([1, 2, 2], vertical_alignment="bottom")
+            fmt = col_format.selectbox("Format", options=list(export.FORMAT), format_func=lambda f: export.FORMAT[f][0])
+            opsi_lingkup = [('semua', None)] + [('band', band) for band in scoring.BAND_RISIKO] + [('kelas', kelas) for kelas in daftar_siswa.list_kelas(conn)]
+            lingkup = col_lingkup.selectbox("Cakupan Laporan", options=opsi_lingkup, format_func=lambda l: {'semua': "Semua Siswa", 'band': f"Tingkat: {l[1]}", 'kelas': f"Kelas: {l[1]}"}[l[0]])
+            # File laporan di-cache di disk per versi data & model. Laporan hanya ditulis saat diminta, bukan pada
+            # setiap rerun; selama data dan model belum berubah, file yang sama langsung disajikan untuk diunduh.
+            # File bisa dipangkas sesi lain kapan saja; jika sudah hilang saat dibaca, tombol "Siapkan laporan" tampil lagi.
+            isi_laporan = export.read_report(export.cached_report(fmt, lingkup, data_version, fingerprint))
+            if isi_laporan is None and col_unduh.button("📝 Siapkan laporan", key="siapkan_laporan"):
+                with st.spinner("Menyiapkan laporan..."):
+                    isi_laporan = export.read_report(export.export_report(conn, fmt, lingkup, data_version, fingerprint))
+            if isi_laporan is not None:
+                col_unduh.download_button(label=f"📥 Download Laporan sebagai {export.FORMAT[fmt][0]}", data=isi_laporan, file_name=f"laporan_risiko_siswa_{export.scope_slug(lingkup)}_{datetime.now().strftime('%Y%m%d')}.{fmt}", mime=export.FORMAT[fmt][1])
+            # Pencarian, filter, dan paginasi dijalankan di SQLite; browser hanya menerima baris satu halaman
+            col_cari, col_band = st.columns([3, 2])
+            cari = col_cari.text_input("Cari nama, NISN, atau kelas", key="cari_prediksi")
+            band = col_band.selectbox("Tingkat Risiko", options=[None, *scoring.BAND_RISIKO], format_func=lambda b: "Semua Tingkat" if b is None else b, key="band_prediksi")
+            df_halaman, berikutnya = daftar_siswa.page_scores(conn, cari, band, halaman_aktif('halaman_prediksi', (cari, band)))
+            st.caption(f"{cached_count_scores(conn, data_version, fingerprint, cari, band)} siswa ditemukan")
+            st.dataframe(df_halaman, use_container_width=True, hide_index=True, column_config={'Tingkat Risiko (%)': st.column_config.ProgressColumn("Tingkat Risiko (%)", format="%.2f%%", min_value=0, max_value=100)})
+            navigasi_halaman('halaman_prediksi', berikutnya)
             st.divider()
             st.subheader("Detail Analisis & Log Intervensi per Siswa")
-            selected_student_name = st.selectbox('Pilih siswa:', options=df_hasil_sorted['Nama_Siswa'])
-            if selected_student_name:
-                student_details = df_siswa[df_siswa['Nama_Siswa'] == selected_student_name].iloc[0]
-                student_risk = df_hasil[df_hasil['Nama_Siswa'] == selected_student_name].iloc[0]
-                key_factors = []
-                if student_details['Jumlah_Absensi'] > 12: key_factors.append("Tingkat Absensi Tinggi")
-                if student_details['Nilai_Rata_Rata_Semester'] < 70: key_factors.append("Penurunan Nilai Akademik")
-                if student_details['Riwayat_Pelanggaran'] > 30: key_factors.append("Masalah Perilaku/Disiplin")
-                if not key_factors: key_factors.append("Tidak ada faktor risiko menonjol")
+            opsi_siswa = dict(zip(df_halaman['NISN'], df_halaman['Nama_Siswa'] + " (" + df_halaman['NISN'] + ")"))
+            nisn_terpilih = st.selectbox('Pilih siswa:', options=list(opsi_siswa), format_func=opsi_siswa.get)
+            if nisn_terpilih:
+                student_details = daftar_siswa.get_student(conn, nisn_terpilih)
+                student_risk = student_details
+                key_factors = scoring.key_factors(student_details)
                 
                 col1, col2 = st.columns(2)
                 with col1:
@@ -248,19 +264,33 @@ def main():
                     st.subheader("Faktor Risiko Utama"); 
                     for factor in key_factors: st.error(f"- {factor}")
                     st.divider()
-                    st.subheader("Grafik Tren Risiko (Contoh)")
-                    chart_data = pd.DataFrame(np.random.randn(5, 1) * 10 + student_risk['Tingkat Risiko (%)'], index=['Bulan 1', 'Bulan 2', 'Bulan 3', 'Bulan 4', 'Bulan 5'], columns=['Tingkat Risiko']).clip(0, 100)
-                    st.line_chart(chart_data)
+                    st.subheader("Grafik Tren Risiko")
+                    df_tren = scoring.read_student_history(conn, student_details['NISN'])
+                    if len(df_tren) > 1:
+                        st.line_chart(df_tren.rename(columns={'risk_score': 'Tingkat Risiko'}).set_index('recorded_at'))
+                    else:
+                        st.info("Riwayat risiko baru memiliki satu catatan. Tren akan muncul setelah data atau skor siswa ini berubah.")
                     
                     
                 with col2:
                     st.subheader("Rekomendasi")
-                    if st.button("💡 Dapatkan Rekomendasi Intervensi berdasarkan Sumber Data", key=f"rekomendasi_ai_{student_details['NISN']}", disabled=not AI_ENABLED):
-                        with st.spinner("Asisten AI sedang berpikir..."):
-                            rekomendasi = generate_ai_recommendations(student_details, student_risk, key_factors)
-                            st.markdown(rekomendasi)
+                    tombol_rekomendasi = st.button("💡 Dapatkan Rekomendasi Intervensi berdasarkan Sumber Data", key=f"rekomendasi_ai_{student_details['NISN']}", disabled=not ai_enabled)
+                    if ai_enabled:
+                        # Rekomendasi yang sudah pernah dibuat untuk data yang sama langsung ditampilkan dari cache
+                        prompt_rekomendasi = build_recommendation_prompt(student_details, student_risk, key_factors)
+                        input_hash = ai_service.cache_key(prompt_rekomendasi)
+                        rekomendasi_tersimpan = get_saved_recommendation(conn, student_details['NISN'], input_hash, fingerprint)
+                        if rekomendasi_tersimpan is not None:
+                            st.markdown(rekomendasi_tersimpan)
+                        else:
+                            job = ai_service.lookup(input_hash)
+                            if job is None and tombol_rekomendasi:
+                                job = ai_service.submit(prompt_rekomendasi)
+                            if job is not None:
+                                render_ai_job(job)
                     st.divider()
                     st.subheader("📝 Log Intervensi & Pelacakan Progres")
+                    df_log = read_log_intervensi(conn, student_details['NISN'])
                     with st.expander("Catat / Hapus Intervensi"):
                         with st.form("form_log", clear_on_submit=True):
                             st.write("**Catat Intervensi Baru**")
@@ -269,82 +299,155 @@ def main():
                             catatan = st.text_area("Catatan Detail")
                             if st.form_submit_button("Simpan Log"):
                                 if catatan and nama_guru:
-                                    log_data = {'nisn': student_details['NISN'], 'tanggal': datetime.now().strftime('%Y-%m-%d %H:%M'), 'tindakan': tindakan, 'catatan': catatan, 'dicatat_oleh': nama_guru}
+                                    log_data = {'nisn': str(student_details['NISN']), 'tanggal': datetime.now().strftime('%Y-%m-%d %H:%M'), 'tindakan': tindakan, 'catatan': catatan, 'dicatat_oleh': nama_guru}
                                     add_log_intervensi(conn, log_data); st.success("Log intervensi berhasil disimpan!"); st.rerun() 
                                 else:
                                     st.warning("Nama Guru dan Catatan Detail tidak boleh kosong.")
                         
-                        df_log_check = read_log_intervensi(conn, student_details['NISN'])
-                        if not df_log_check.empty:
+                        if not df_log.empty:
                             st.divider()
                             st.write("**Hapus Catatan Intervensi**")
-                            log_options = {row['id']: f"{row['tanggal']} - {row['tindakan']} (oleh {row['dicatat_oleh']})" for index, row in df_log_check.iterrows()}
+                            log_options = {row['id']: f"{row['tanggal']} - {row['tindakan']} (oleh {row['dicatat_oleh']})" for index, row in df_log.iterrows()}
                             selected_log_id = st.selectbox("Pilih catatan untuk dihapus:", options=log_options.keys(), format_func=lambda x: log_options[x])
                             if st.button("Hapus Catatan Terpilih", type="primary"):
                                 delete_log_intervensi(conn, selected_log_id); st.success("Catatan berhasil dihapus!"); st.rerun()
                     
-                    df_log_display = read_log_intervensi(conn, student_details['NISN'])
-                    if not df_log_display.empty:
+                    if not df_log.empty:
                         st.write("Riwayat Intervensi yang Sudah Tercatat:")
-                        st.dataframe(df_log_display.drop(columns=['id']), use_container_width=True)
-                        if st.button("🧠 Analisis Catatan Intervensi", key=f"analisis_ai_{student_details['NISN']}", disabled=not AI_ENABLED):
-                            with st.spinner("AI sedang menganalisis catatan..."):
-                                analisis_log = analyze_intervention_logs(df_log_display.drop(columns=['id']), selected_student_name)
-                                st.markdown(analisis_log)
+                        st.dataframe(df_log.drop(columns=['id']), use_container_width=True)
+                        tombol_analisis = st.button("🧠 Analisis Catatan Intervensi", key=f"analisis_ai_{student_details['NISN']}", disabled=not ai_enabled)
+                        if ai_enabled:
+                            prompt_analisis = build_log_analysis_prompt(df_log.drop(columns=['id']), student_details['Nama_Siswa'])
+                            job = ai_service.lookup(ai_service.cache_key(prompt_analisis))
+                            if job is None and tombol_analisis:
+                                job = ai_service.submit(prompt_analisis)
+                            if job is not None:
+                                render_ai_job(job)
                     else:
                         st.info("Belum ada riwayat intervensi untuk siswa ini.")
 
-    with tab_analitik:
+    with tab_analitik, profil.tahap("Tab analitik"):
         st.header("Analitik Risiko Siswa Tingkat Sekolah")
-        if df_hasil_sorted.empty:
+        ringkasan = cached_school_summary(conn, data_version, fingerprint)
+        if ringkasan['jumlah_siswa'] == 0:
             st.warning("Database siswa kosong.")
         else:
-            df_berisiko = df_hasil_sorted[df_hasil_sorted['Tingkat Risiko (%)'] >= 70]
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Siswa", len(df_hasil_sorted))
-            col2.metric("Siswa Berisiko Tinggi (>70%)", len(df_berisiko), f"{len(df_berisiko)/len(df_hasil_sorted):.1%}")
-            col3.metric("Rata-rata Risiko Sekolah", f"{df_hasil_sorted['Tingkat Risiko (%)'].mean():.2f}%")
+            col1.metric("Total Siswa", int(ringkasan['jumlah_siswa']))
+            col2.metric(f"Siswa Berisiko Tinggi (>{scoring.AMBANG_RISIKO_TINGGI}%)", int(ringkasan['berisiko_tinggi']), f"{ringkasan['persen_berisiko_tinggi']:.1%}")
+            col3.metric("Rata-rata Risiko Sekolah", f"{ringkasan['rata_rata_risiko']:.2f}%")
+            # Dibulatkan ke tanggal agar kunci cache hanya berganti sekali sehari, bukan setiap rerun
+            sejak = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+            df_delta = cached_risk_delta_since(conn, data_version, fingerprint, sejak).dropna(subset=['delta'])
+            if not df_delta.empty:
+                st.subheader("Perubahan Risiko Sejak Bulan Lalu")
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Rata-rata Perubahan Risiko", f"{df_delta['delta'].mean():+.2f} poin")
+                col2.metric("Siswa dengan Risiko Naik > 10 Poin", int((df_delta['delta'] > 10).sum()))
+                col3.metric("Siswa dengan Risiko Turun > 10 Poin", int((df_delta['delta'] < -10).sum()))
+                df_naik = df_delta[df_delta['delta'] > 0].nlargest(10, 'delta')
+                if not df_naik.empty:
+                    st.dataframe(df_naik, use_container_width=True, hide_index=True)
+            with st.expander(f"🤖 Rekomendasi AI Massal untuk Siswa Berisiko Tinggi (>{scoring.AMBANG_RISIKO_TINGGI}%)"):
+                st.write(f"Membuat rekomendasi untuk {int(ringkasan['berisiko_tinggi'])} siswa berisiko tinggi sekaligus. Siswa yang datanya tidak berubah sejak rekomendasi terakhir akan dilewati, dan hasilnya langsung tampil di Dasbor Prediksi Risiko.")
+                if st.button("Buat Rekomendasi Massal", disabled=not ai_enabled or ringkasan['berisiko_tinggi'] == 0):
+                    progres = st.progress(0.0, text="Menyiapkan...")
+                    def tampilkan_progres(stats):
+                        diproses = stats['selesai'] + stats['gagal']
+                        progres.progress(diproses / max(stats['total'] - stats['dilewati'], 1), text=f"{diproses} dari {stats['total'] - stats['dilewati']} siswa ({stats['per_menit']:.1f} siswa/menit)")
+                    stats = run_batch(ai_service, get_pool(), fingerprint, on_progress=tampilkan_progres)
+                    progres.empty()
+                    col_a, col_b, col_c, col_d = st.columns(4)
+                    col_a.metric("Dibuat", stats['selesai'])
+                    col_b.metric("Dilewati (tidak berubah)", stats['dilewati'])
+                    col_c.metric("Gagal", stats['gagal'])
+                    col_d.metric("Throughput", f"{stats['per_menit']:.1f}/menit", f"{stats['detik']:.1f} detik", delta_color="off")
             st.divider()
             col1, col2 = st.columns(2)
             with col1:
                 st.subheader("Rata-rata Risiko per Kelas")
-                # Gabungkan df_siswa dengan df_hasil_sorted untuk mendapatkan kelas dan risiko bersamaan
-                df_merged_risk = df_siswa.merge(df_hasil_sorted[['NISN', 'Tingkat Risiko (%)']], on="NISN")
-                risiko_per_kelas = df_merged_risk.groupby('Kelas')['Tingkat Risiko (%)'].mean().sort_values(ascending=False)
+                risiko_per_kelas = cached_risk_by_group(conn, data_version, fingerprint, 'Kelas')['rata_rata_risiko']
                 st.bar_chart(risiko_per_kelas)
+                kelas_tren = st.selectbox("Tren risiko bulanan untuk kelas:", options=risiko_per_kelas.index)
+                df_tren_kelas = scoring.read_class_history(conn, kelas_tren)
+                st.line_chart(df_tren_kelas.set_index('periode')['risk_score'].rename('Rata-rata Risiko'))
             with col2:
                 st.subheader("Distribusi Faktor Risiko Utama")
-                if not df_berisiko.empty:
-                    faktor_counts = {}
-                    df_siswa_berisiko = df_siswa[df_siswa['NISN'].isin(df_berisiko['NISN'])]
-                    faktor_counts['Absensi Tinggi'] = len(df_siswa_berisiko[df_siswa_berisiko['Jumlah_Absensi'] > 12])
-                    faktor_counts['Akademik Rendah'] = len(df_siswa_berisiko[df_siswa_berisiko['Nilai_Rata_Rata_Semester'] < 70])
-                    faktor_counts['Masalah Disiplin'] = len(df_siswa_berisiko[df_siswa_berisiko['Riwayat_Pelanggaran'] > 30])
-                    df_faktor = pd.DataFrame(list(faktor_counts.items()), columns=['Faktor', 'Jumlah Siswa'])
-                    st.bar_chart(df_faktor.set_index('Faktor'))
+                if ringkasan['berisiko_tinggi'] > 0:
+                    st.caption(f"Jumlah siswa berisiko tinggi yang risikonya dinaikkan minimal {scoring.BATAS_KONTRIBUSI:g} poin oleh faktor tersebut menurut model.")
+                    df_faktor = pd.DataFrame({'Jumlah Siswa': [int(ringkasan[label]) for label, _ in analytics.FAKTOR]}, index=pd.Index([label for label, _ in analytics.FAKTOR], name='Faktor'))
+                    st.bar_chart(df_faktor)
                 else:
                     st.info("Tidak ada siswa dalam kategori berisiko tinggi saat ini.")
+            st.divider()
+            st.subheader("🔎 Drill-down Risiko")
+            dimensi = st.radio("Kelompokkan berdasarkan:", list(analytics.DIMENSI), horizontal=True)
+            df_grup = cached_risk_by_group(conn, data_version, fingerprint, dimensi)
+            st.dataframe(df_grup, use_container_width=True, column_config=KONFIGURASI_KOLOM_ANALITIK)
+            nilai_grup = st.selectbox(f"Lihat detail {dimensi}:", options=df_grup.index)
+            dimensi_lain = next(d for d in analytics.DIMENSI if d != dimensi)
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**{nilai_grup}** per {dimensi_lain}")
+                st.dataframe(cached_risk_by_group(conn, data_version, fingerprint, dimensi_lain, dimensi, nilai_grup), use_container_width=True, column_config=KONFIGURASI_KOLOM_ANALITIK)
+            with col2:
+                st.write(f"Siswa berisiko tinggi di **{nilai_grup}**")
+                st.dataframe(cached_high_risk_students(conn, data_version, fingerprint, dimensi, nilai_grup), use_container_width=True, hide_index=True)
 
-    with tab_admin:
+    with tab_admin, profil.tahap("Tab manajemen data"):
         st.header("Manajemen Database Siswa")
-        df_admin = read_data(conn)
         with st.expander("➕ Tambah Siswa Baru"):
             with st.form("form_tambah_siswa", clear_on_submit=True):
                 col1, col2, col3 = st.columns(3)
                 with col1: nama_baru = st.text_input("Nama Siswa", placeholder="Budi Santoso"); nisn_baru = st.text_input("NISN", placeholder="1234567890"); kelas_baru = st.text_input("Kelas", placeholder="XI MIPA 3")
                 with col2: nilai_baru = st.number_input("Nilai Rata-Rata Semester", min_value=0.0, max_value=100.0, value=75.0); absensi_baru = st.number_input("Jumlah Absensi", min_value=0, value=0); pelanggaran_baru = st.number_input("Riwayat Pelanggaran", min_value=0, value=0)
-                with col3: beasiswa_baru = st.selectbox("Status Beasiswa", ["Tidak", "Ya"], key="beasiswa_admin"); pekerjaan_baru = st.selectbox("Pekerjaan Orang Tua", ['PNS', 'Wiraswasta', 'Buruh', 'Petani', 'Lainnya'], key="pekerjaan_admin")
+                with col3: beasiswa_baru = st.selectbox("Status Beasiswa", PILIHAN_BEASISWA[::-1], key="beasiswa_admin"); pekerjaan_baru = st.selectbox("Pekerjaan Orang Tua", PILIHAN_PEKERJAAN, key="pekerjaan_admin")
                 if st.form_submit_button("Tambah Siswa"):
                     data_baru = {'Nama_Siswa': nama_baru, 'NISN': nisn_baru, 'Kelas': kelas_baru, 'Nilai_Rata_Rata_Semester': nilai_baru, 'Jumlah_Absensi': absensi_baru, 'Status_Beasiswa': beasiswa_baru, 'Pekerjaan_Orang_Tua': pekerjaan_baru, 'Riwayat_Pelanggaran': pelanggaran_baru}
-                    add_data(conn, data_baru)
-                    st.rerun()
+                    try:
+                        add_data(conn, data_baru)
+                        st.rerun()
+                    except sqlite3.IntegrityError:
+                        st.error(f"NISN {nisn_baru} sudah terdaftar.")
+        with st.expander("📥 Impor Massal Siswa (CSV/Excel)"):
+            st.caption("Kolom wajib: " + ", ".join(KOLOM_DATA_SISWA))
+            file_impor = st.file_uploader("Pilih file roster", type=["csv", "xlsx"], key="file_impor")
+            update_existing = st.checkbox("Perbarui siswa yang NISN-nya sudah terdaftar", key="impor_update")
+            if st.button("Mulai Impor", disabled=file_impor is None):
+                progres = st.progress(0.0, text="Mengimpor...")
+                total_dibaca = total_diterima = 0
+                daftar_ditolak = []
+                try:
+                    for hasil in import_siswa(conn, file_impor, update_existing=update_existing):
+                        total_dibaca += hasil['dibaca']; total_diterima += hasil['diterima']
+                        if not hasil['ditolak'].empty: daftar_ditolak.append(hasil['ditolak'])
+                        progres.progress(min(file_impor.tell() / max(file_impor.size, 1), 1.0), text=f"{total_dibaca} baris dibaca, {total_diterima} diterima")
+                except ValueError as e:
+                    st.error(f"Impor dibatalkan: {e}")
+                else:
+                    st.success(f"{total_diterima} dari {total_dibaca} siswa berhasil diimpor.")
+                finally:
+                    progres.empty()
+                if daftar_ditolak:
+                    df_ditolak = pd.concat(daftar_ditolak, ignore_index=True)
+                    st.warning(f"{len(df_ditolak)} baris ditolak:")
+                    st.dataframe(df_ditolak.head(1000), use_container_width=True, hide_index=True)
+                    st.download_button("📥 Download Baris yang Ditolak", data=df_ditolak.to_csv(index=False), file_name="baris_ditolak.csv", mime="text/csv")
         st.divider()
         st.subheader("✏️ Edit atau Hapus Data Siswa")
-        st.info("Gunakan tabel di bawah untuk mengedit data secara langsung. Klik 'Simpan Perubahan' setelah selesai.")
-        df_edited = st.data_editor(df_admin, num_rows="dynamic", use_container_width=True, key="data_editor")
+        st.info("Gunakan tabel di bawah untuk mengedit data secara langsung. Klik 'Simpan Perubahan' setelah selesai; perubahan hanya berlaku untuk halaman yang tampil.")
+        cari_admin = st.text_input("Cari nama, NISN, atau kelas", key="cari_admin")
+        halaman_admin = halaman_aktif('halaman_admin', cari_admin)
+        df_admin, berikutnya_admin = daftar_siswa.page_students(conn, cari_admin, halaman_admin)
+        # Key editor mengikuti halaman agar suntingan yang belum disimpan tidak terbawa ke baris halaman lain
+        df_edited = st.data_editor(df_admin, num_rows="dynamic", use_container_width=True, hide_index=True, key=f"data_editor_{cari_admin}_{halaman_admin}")
+        navigasi_halaman('halaman_admin', berikutnya_admin)
         if st.button("Simpan Perubahan"):
-            update_data(conn, df_edited)
-            st.rerun()
+            try:
+                update_data(conn, df_admin, df_edited)
+                st.rerun()
+            except ValueError as e:
+                st.error(f"Perubahan tidak disimpan: {e}")
         with st.expander("❌ Hapus Siswa"):
             options_dict = dict(zip(df_admin['NISN'], df_admin['Nama_Siswa'] + " (" + df_admin['NISN'].astype(str) + ")"))
             nisn_untuk_dihapus = st.multiselect("Pilih siswa untuk dihapus:", options=options_dict.keys(), format_func=lambda x: options_dict[x])
@@ -355,11 +458,12 @@ def main():
                 else:
                     st.warning("Silakan pilih minimal satu siswa untuk dihapus.")
 
-    conn.close()
+    profil.render()
 
 ### --- PERBAIKAN: "Bungkus" Aplikasi Utama dengan Pemeriksaan Password --- ###
 if check_password():
     # Jika password benar, jalankan seluruh aplikasi utama
 
 # if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with get_pool().connection() as conn:
+        main(conn)
\ No newline at end of file
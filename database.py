@@ -0,0 +1,259 @@
+# database.py
+# Akses database SQLite: skema, migrasi, dan operasi baca/tulis data siswa & log intervensi.
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+import scoring
+from skema import KOLOM_DATA_SISWA
+
+NAMA_FILE_DB = 'siswa.db'
+
+DDL_DATA_SISWA = """CREATE TABLE IF NOT EXISTS data_siswa (Nama_Siswa TEXT, NISN TEXT PRIMARY KEY, Kelas TEXT, Nilai_Rata_Rata_Semester REAL, Jumlah_Absensi INTEGER, Status_Beasiswa TEXT, Pekerjaan_Orang_Tua TEXT, Riwayat_Pelanggaran INTEGER)"""
+
+# PRAGMA untuk setiap koneksi. journal_mode=WAL bersifat permanen di file database,
+# sehingga pembaca tidak lagi memblokir penulis (dan sebaliknya).
+PRAGMA_KONEKSI = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=134217728",
+)
+
+def get_connection(path=NAMA_FILE_DB):
+    """Membuat koneksi ke database SQLite dengan PRAGMA yang sudah disetel.
+
+    sqlite3 menyimpan cache prepared statement per koneksi (cached_statements), sehingga query
+    dengan teks SQL yang sama tidak dikompilasi ulang.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, cached_statements=256)
+    for pragma in PRAGMA_KONEKSI:
+        conn.execute(pragma)
+    return conn
+
+class ConnectionPool:
+    """Kumpulan koneksi SQLite yang dipakai bersama oleh semua sesi Streamlit.
+
+    Setiap rerun meminjam satu koneksi lewat connection() dan mengembalikannya setelah selesai,
+    termasuk ketika rerun dihentikan oleh st.rerun() atau st.stop().
+    """
+
+    def __init__(self, path=NAMA_FILE_DB, size=8, timeout=30.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._dibuat = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Meminjam koneksi dari pool; membuat koneksi baru jika pool belum penuh."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._dibuat < self.size:
+                self._dibuat += 1
+                return get_connection(self.path)
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"Tidak ada koneksi database yang tersedia setelah {self.timeout} detik.")
+
+    def release(self, conn):
+        """Mengembalikan koneksi ke pool; transaksi yang belum selesai dibatalkan."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Menutup semua koneksi yang sedang tidak dipinjam."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._dibuat -= 1
+
+def _migrasi_tabel_dasar(conn):
+    cursor = conn.cursor()
+    cursor.execute(DDL_DATA_SISWA)
+    cursor.execute("""CREATE TABLE IF NOT EXISTS log_intervensi (id INTEGER PRIMARY KEY AUTOINCREMENT, nisn TEXT NOT NULL, tanggal TEXT NOT NULL, tindakan TEXT NOT NULL, catatan TEXT, dicatat_oleh TEXT, FOREIGN KEY (nisn) REFERENCES data_siswa(NISN))""")
+    conn.commit()
+    migrate_nisn_schema(conn)
+    scoring.init_scoring_db(conn)
+
+def _migrasi_indeks(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_log_intervensi_nisn_tanggal ON log_intervensi (nisn, tanggal)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_data_siswa_kelas ON data_siswa (Kelas)")
+    conn.commit()
+
+def _migrasi_ai_cache(conn):
+    # Cache respons AI ber-TTL milik ai_service.AIService
+    conn.execute("""CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)""")
+    conn.commit()
+
+def _migrasi_rekomendasi(conn):
+    # Rekomendasi AI tersimpan per siswa milik batch_rekomendasi
+    conn.execute("""CREATE TABLE IF NOT EXISTS ai_rekomendasi (NISN TEXT PRIMARY KEY, rekomendasi TEXT NOT NULL, input_hash TEXT NOT NULL, model_fingerprint TEXT NOT NULL, created_at TEXT NOT NULL)""")
+    conn.commit()
+
+def _migrasi_indeks_peringkat(conn):
+    # Urutan peringkat (risiko tertinggi, lalu NISN) untuk paginasi keyset di daftar_siswa
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_risk_score_peringkat ON risk_score (risk_score DESC, NISN)")
+    conn.commit()
+
+# Daftar migrasi berurutan. PRAGMA user_version mencatat berapa langkah yang sudah dijalankan,
+# sehingga setiap langkah hanya berjalan sekali per database. Tambahkan langkah baru di akhir.
+# Seluruh skema dimiliki lapisan data ini (tabel skor oleh scoring); modul fitur tidak membuat tabel sendiri.
+MIGRASI = [
+    _migrasi_tabel_dasar,
+    _migrasi_indeks,
+    _migrasi_ai_cache,
+    _migrasi_rekomendasi,
+    scoring.init_history_db,
+    scoring.init_attribution_db,
+    _migrasi_indeks_peringkat,
+]
+
+def init_db(path=NAMA_FILE_DB):
+    """Menjalankan migrasi skema yang belum pernah dijalankan pada database."""
+    conn = get_connection(path)
+    try:
+        versi = conn.execute("PRAGMA user_version").fetchone()[0]
+        for nomor, migrasi in enumerate(MIGRASI[versi:], start=versi + 1):
+            migrasi(conn)
+            conn.execute(f"PRAGMA user_version = {nomor}")
+    finally:
+        conn.close()
+
+def migrate_nisn_schema(conn):
+    """Memulihkan NISN TEXT PRIMARY KEY jika tabel data_siswa pernah ditulis ulang oleh to_sql(if_exists='replace')."""
+    kolom = {row[1]: row for row in conn.execute("PRAGMA table_info(data_siswa)")}
+    if kolom['NISN'][2].upper() != 'TEXT' or kolom['NISN'][5] == 0:
+        daftar_kolom = ', '.join(KOLOM_DATA_SISWA)
+        with conn:
+            conn.execute("BEGIN")
+            # Tabel baru dibuat lalu di-rename (bukan me-rename tabel lama) agar referensi FOREIGN KEY
+            # dari log_intervensi tetap menunjuk ke data_siswa
+            conn.execute(DDL_DATA_SISWA.replace('IF NOT EXISTS data_siswa', 'data_siswa_baru'))
+            # Jika NISN ganda, baris terakhir yang dipertahankan (INSERT OR REPLACE); baris lain beserta baris tanpa
+            # NISN disalin ke data_siswa_tersisih agar tidak hilang diam-diam dan bisa diperiksa atau dipulihkan
+            conn.execute(f"""CREATE TABLE IF NOT EXISTS data_siswa_tersisih AS SELECT {daftar_kolom} FROM data_siswa WHERE 0""")
+            conn.execute(f"""INSERT INTO data_siswa_tersisih SELECT {daftar_kolom} FROM data_siswa
+                             WHERE NISN IS NULL OR rowid NOT IN (SELECT MAX(rowid) FROM data_siswa GROUP BY CAST(NISN AS TEXT))""")
+            conn.execute(f"INSERT OR REPLACE INTO data_siswa_baru ({daftar_kolom}) SELECT {daftar_kolom.replace('NISN', 'CAST(NISN AS TEXT)')} FROM data_siswa WHERE NISN IS NOT NULL ORDER BY rowid")
+            conn.execute("DROP TABLE data_siswa")
+            conn.execute("ALTER TABLE data_siswa_baru RENAME TO data_siswa")
+    # NISN yang pernah tersimpan sebagai numpy.int64 masuk ke SQLite sebagai BLOB 8 byte
+    log_blob = conn.execute("SELECT id, nisn FROM log_intervensi WHERE typeof(nisn) = 'blob' AND length(nisn) = 8").fetchall()
+    if log_blob:
+        with conn:
+            conn.executemany("UPDATE log_intervensi SET nisn = ? WHERE id = ?", [(str(int.from_bytes(nisn, 'little', signed=True)), log_id) for log_id, nisn in log_blob])
+
+def read_data(conn, query='SELECT * FROM data_siswa'):
+    """Membaca data siswa dari database."""
+    return pd.read_sql(query, conn)
+
+def diff_data(df_awal, df_edited):
+    """Membandingkan snapshot awal data editor dengan hasil edit, berbasis NISN.
+
+    Mengembalikan tuple (baris_baru, baris_berubah, nisn_dihapus). Melempar ValueError jika ada NISN kosong atau ganda.
+    """
+    df_edited = df_edited[KOLOM_DATA_SISWA].copy()
+    nisn_edit = df_edited['NISN'].astype('string').str.strip()
+    if nisn_edit.isna().any() or (nisn_edit == '').any():
+        raise ValueError("NISN tidak boleh kosong.")
+    if nisn_edit.duplicated().any():
+        raise ValueError(f"NISN ganda: {', '.join(nisn_edit[nisn_edit.duplicated()].unique())}")
+    df_edited['NISN'] = nisn_edit.astype(str)
+    df_awal = df_awal[KOLOM_DATA_SISWA].assign(NISN=df_awal['NISN'].astype(str)).set_index('NISN')
+    df_edited = df_edited.set_index('NISN')
+
+    nisn_dihapus = df_awal.index.difference(df_edited.index)
+    baris_baru = df_edited.loc[df_edited.index.difference(df_awal.index)]
+    nisn_sama = df_edited.index.intersection(df_awal.index)
+    awal, edit = df_awal.loc[nisn_sama], df_edited.loc[nisn_sama]
+    sama = (awal == edit) | (awal.isna() & edit.isna())
+    baris_berubah = edit[~sama.all(axis=1)]
+    return baris_baru.reset_index()[KOLOM_DATA_SISWA], baris_berubah.reset_index()[KOLOM_DATA_SISWA], list(nisn_dihapus)
+
+def update_data(conn, df_awal, df_edited):
+    """Menyimpan hasil data editor ke database: hanya baris yang ditambah, diubah, atau dihapus yang ditulis.
+
+    Semua perubahan diterapkan dalam satu transaksi. Mengembalikan jumlah baris yang ditulis.
+    """
+    baris_baru, baris_berubah, nisn_dihapus = diff_data(df_awal, df_edited)
+    # Editor hanya menampilkan satu halaman, jadi baris baru bisa memakai NISN siswa di halaman lain; baris baru
+    # ditulis dengan INSERT biasa agar tidak pernah menimpa siswa lain, dan upsert hanya untuk baris dari snapshot.
+    nisn_baru = baris_baru['NISN'].tolist()
+    terdaftar = [row[0] for row in conn.execute(f"SELECT NISN FROM data_siswa WHERE NISN IN ({', '.join(['?'] * len(nisn_baru))})", nisn_baru)]
+    if terdaftar:
+        raise ValueError(f"NISN sudah terdaftar untuk siswa lain: {', '.join(terdaftar)}")
+    kolom = ', '.join(KOLOM_DATA_SISWA)
+    kolom_update = ', '.join(f"{col} = excluded.{col}" for col in KOLOM_DATA_SISWA if col != 'NISN')
+    query_baru = f"INSERT INTO data_siswa ({kolom}) VALUES ({', '.join(['?'] * len(KOLOM_DATA_SISWA))})"
+    query_ubah = f"{query_baru} ON CONFLICT(NISN) DO UPDATE SET {kolom_update}"
+    rows_baru, rows_ubah = (list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)) for df in (baris_baru, baris_berubah))
+    try:
+        with conn:
+            cursor = conn.cursor()
+            cursor.executemany("DELETE FROM data_siswa WHERE NISN = ?", [(nisn,) for nisn in nisn_dihapus])
+            cursor.executemany(query_baru, rows_baru)
+            cursor.executemany(query_ubah, rows_ubah)
+            scoring.forget(conn, nisn_dihapus, commit=False)
+            scoring.mark_changed(conn, nisn_baru + baris_berubah['NISN'].tolist(), commit=False)
+    except sqlite3.IntegrityError as e:
+        # Siswa dengan NISN yang sama ditambahkan sesi lain setelah pemeriksaan di atas
+        raise ValueError(f"NISN sudah terdaftar untuk siswa lain ({e}).") from e
+    return len(rows_baru) + len(rows_ubah) + len(nisn_dihapus)
+
+def add_data(conn, data_baru):
+    """Menambahkan siswa baru ke database."""
+    query = "INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas, Nilai_Rata_Rata_Semester, Jumlah_Absensi, Status_Beasiswa, Pekerjaan_Orang_Tua, Riwayat_Pelanggaran) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    cursor = conn.cursor()
+    cursor.execute(query, tuple(data_baru.values()))
+    scoring.mark_changed(conn, [data_baru['NISN']], commit=False)
+    conn.commit()
+
+def delete_data(conn, nisn_list):
+    """Menghapus siswa dari database berdasarkan NISN."""
+    query = "DELETE FROM data_siswa WHERE NISN IN ({seq})".format(seq=','.join(['?']*len(nisn_list)))
+    cursor = conn.cursor()
+    cursor.execute(query, nisn_list)
+    scoring.forget(conn, nisn_list, commit=False)
+    conn.commit()
+
+def add_log_intervensi(conn, log_data):
+    """Menambahkan catatan log intervensi baru."""
+    query = "INSERT INTO log_intervensi (nisn, tanggal, tindakan, catatan, dicatat_oleh) VALUES (?, ?, ?, ?, ?)"
+    cursor = conn.cursor()
+    cursor.execute(query, tuple(log_data.values()))
+    conn.commit()
+
+def read_log_intervensi(conn, nisn):
+    """Membaca riwayat log intervensi untuk seorang siswa."""
+    return pd.read_sql("SELECT id, tanggal, tindakan, catatan, dicatat_oleh FROM log_intervensi WHERE nisn = ? ORDER BY tanggal DESC", conn, params=(nisn,))
+
+def delete_log_intervensi(conn, log_id):
+    """Menghapus satu catatan log intervensi berdasarkan ID uniknya."""
+    query = "DELETE FROM log_intervensi WHERE id = ?"
+    cursor = conn.cursor()
+    cursor.execute(query, (log_id,))
+    conn.commit()
@@ -0,0 +1,68 @@
+# encoding.py
+# Encoder fitur bersama untuk skor massal dan Mode Simulasi: data mentah siswa langsung diisi ke matriks
+# NumPy sesuai urutan model_columns, dengan transformasi scaler sudah dilipat ke dalamnya.
+
+import numpy as np
+import pandas as pd
+
+from model_artifact import KOLOM_NUMERIK, AffineScaler
+from skema import PILIHAN_PEKERJAAN
+
+
+class FeatureEncoder:
+    """Encoder yang dibangun sekali dari model_columns dan scaler; hasilnya siap untuk model.predict_proba.
+
+    Karena scaler bersifat affine, kolom one-hot bernilai offset saat 0 dan multiplier + offset saat 1,
+    sehingga setiap baris cukup diawali dari vektor offset lalu diisi kolom numerik dan satu kolom pekerjaan.
+    """
+
+    def __init__(self, model_columns, scaler):
+        affine = scaler if isinstance(scaler, AffineScaler) else AffineScaler.from_sklearn(scaler)
+        self.model_columns = [str(c) for c in model_columns]
+        self._multiplier = np.asarray(affine.multiplier, dtype=float)
+        self._offset = np.asarray(affine.offset, dtype=float)
+        self._idx_numerik = {kolom: self.model_columns.index(kolom) for kolom in KOLOM_NUMERIK}
+        # Indeks kolom one-hot per kode kategori PILIHAN_PEKERJAAN; -1 untuk kategori yang di-drop saat pelatihan.
+        # Elemen terakhir melayani kode -1 (pekerjaan tidak dikenal), yang seperti pd.get_dummies menjadi semua 0.
+        self._idx_pekerjaan = np.array([self._kolom(f'Pekerjaan_Orang_Tua_{p}') for p in PILIHAN_PEKERJAAN] + [-1])
+
+    def _kolom(self, nama):
+        return self.model_columns.index(nama) if nama in self.model_columns else -1
+
+    def transform(self, df):
+        """Meng-encode DataFrame data mentah siswa (kolom data_siswa) dalam satu lintasan tervektorisasi."""
+        X = np.empty((len(df), len(self.model_columns)))
+        X[:] = self._offset
+        for kolom, i in self._idx_numerik.items():
+            nilai = (df[kolom] == 'Ya').to_numpy(dtype=float) if kolom == 'Status_Beasiswa' else df[kolom].to_numpy(dtype=float)
+            X[:, i] += nilai * self._multiplier[i]
+        kode = pd.Categorical(df['Pekerjaan_Orang_Tua'], categories=PILIHAN_PEKERJAAN).codes
+        target = self._idx_pekerjaan[kode]
+        baris = np.flatnonzero(target >= 0)
+        X[baris, target[baris]] += self._multiplier[target[baris]]
+        return X
+
+    def encode_one(self, siswa):
+        """Meng-encode satu siswa (dict atau Series dengan kolom data_siswa) menjadi matriks 1 baris tanpa pandas."""
+        x = self._offset.copy()
+        for kolom, i in self._idx_numerik.items():
+            nilai = float(siswa[kolom] == 'Ya') if kolom == 'Status_Beasiswa' else float(siswa[kolom])
+            x[i] += nilai * self._multiplier[i]
+        if siswa['Pekerjaan_Orang_Tua'] in PILIHAN_PEKERJAAN:
+            i = self._idx_pekerjaan[PILIHAN_PEKERJAAN.index(siswa['Pekerjaan_Orang_Tua'])]
+            if i >= 0:
+                x[i] += self._multiplier[i]
+        return x.reshape(1, -1)
+
+    def sweep(self, model, siswa, kolom_x, nilai_x, kolom_y, nilai_y):
+        """Skor risiko (%) seorang siswa bila dua fitur numerik diubah di sepanjang grid, dalam satu panggilan model.
+
+        Mengembalikan DataFrame dengan indeks nilai_y dan kolom nilai_x, misalnya Nilai_Rata_Rata_Semester x Jumlah_Absensi.
+        """
+        nilai_x, nilai_y = np.asarray(nilai_x, dtype=float), np.asarray(nilai_y, dtype=float)
+        X = np.repeat(self.encode_one(siswa), len(nilai_x) * len(nilai_y), axis=0)
+        i, j = self._idx_numerik[kolom_x], self._idx_numerik[kolom_y]
+        X[:, i] = np.tile(nilai_x, len(nilai_y)) * self._multiplier[i] + self._offset[i]
+        X[:, j] = np.repeat(nilai_y, len(nilai_x)) * self._multiplier[j] + self._offset[j]
+        risiko = model.predict_proba(X)[:, 1].reshape(len(nilai_y), len(nilai_x)) * 100
+        return pd.DataFrame(risiko, index=pd.Index(nilai_y, name=kolom_y), columns=pd.Index(nilai_x, name=kolom_x))
@@ -0,0 +1,127 @@
+# export.py
+# Ekspor laporan risiko (XLSX/CSV/Parquet) yang ditulis per potongan baris dan di-cache di disk.
+
+import csv
+import hashlib
+import os
+import re
+import threading
+
+import scoring
+
+DIR_CACHE = os.path.join('.cache', 'laporan')
+UKURAN_CHUNK = 5000
+KOLOM_LAPORAN = ['Nama_Siswa', 'NISN', 'Kelas', 'Tingkat Risiko (%)']
+NAMA_SHEET = 'Laporan Risiko Siswa'
+
+FORMAT = {
+    'xlsx': ('Excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('CSV', 'text/csv'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def iter_report_rows(conn, lingkup=('semua', None), chunksize=UKURAN_CHUNK):
+    """Menghasilkan baris laporan dalam potongan (list of tuple), diurutkan dari risiko tertinggi.
+
+    lingkup: ('semua', None), ('kelas', nama_kelas), atau ('band', nama_band dari scoring.BAND_RISIKO).
+    """
+    jenis, nilai = lingkup
+    where, params = '', ()
+    if jenis == 'kelas':
+        where, params = "WHERE d.Kelas = ?", (nilai,)
+    elif jenis == 'band':
+        bawah, atas = scoring.BAND_RISIKO[nilai]
+        where, params = "WHERE r.risk_score >= ? AND r.risk_score < ?", (bawah, atas)
+    cursor = conn.execute(f"""SELECT d.Nama_Siswa, d.NISN, d.Kelas, r.risk_score
+                              FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN
+                              {where} ORDER BY r.risk_score DESC""", params)
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            break
+        yield rows
+
+
+def write_xlsx(path, chunks):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(NAMA_SHEET)
+    sheet.append(KOLOM_LAPORAN)
+    for rows in chunks:
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def write_csv(path, chunks):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(KOLOM_LAPORAN)
+        for rows in chunks:
+            writer.writerows(rows)
+
+
+def write_parquet(path, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([('Nama_Siswa', pa.string()), ('NISN', pa.string()), ('Kelas', pa.string()), ('Tingkat Risiko (%)', pa.float64())])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in chunks:
+            kolom = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(k, type=f.type) for k, f in zip(kolom, schema)], schema=schema))
+
+
+PENULIS = {'xlsx': write_xlsx, 'csv': write_csv, 'parquet': write_parquet}
+
+
+def scope_slug(lingkup):
+    """Nama pendek cakupan laporan untuk nama file, misalnya "kelas-XI_MIPA_3"."""
+    jenis, nilai = lingkup
+    return jenis if nilai is None else f"{jenis}-{re.sub(r'[^A-Za-z0-9]+', '_', str(nilai)).strip('_')}"
+
+
+def _prefix(lingkup):
+    # Slug bisa sama untuk dua kelas berbeda ("XI MIPA-3" dan "XI MIPA 3"), jadi hash nilai lingkup mentah ikut di nama file
+    kode = hashlib.sha256(repr(lingkup).encode('utf-8')).hexdigest()[:8]
+    return f"laporan_{scope_slug(lingkup)}-{kode}_"
+
+
+def _report_path(fmt, lingkup, data_version, fingerprint, cache_dir):
+    return os.path.join(cache_dir, f"{_prefix(lingkup)}{data_version}_{fingerprint}.{fmt}")
+
+
+def cached_report(fmt, lingkup, data_version, fingerprint, cache_dir=DIR_CACHE):
+    """Path file laporan jika sudah ada di cache untuk versi data dan model ini, atau None; tidak pernah menulis file."""
+    path = _report_path(fmt, lingkup, data_version, fingerprint, cache_dir)
+    return path if os.path.exists(path) else None
+
+
+def read_report(path):
+    """Isi file laporan (bytes), atau None jika path None atau file sudah dihapus, misalnya dipangkas oleh sesi lain."""
+    if path is None:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def export_report(conn, fmt, lingkup, data_version, fingerprint, cache_dir=DIR_CACHE):
+    """Mengembalikan path file laporan, dibuat hanya jika belum ada di cache untuk versi data dan model ini.
+
+    File lama untuk lingkup dan format yang sama dihapus setelah file baru selesai ditulis.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    prefix = _prefix(lingkup)
+    path = _report_path(fmt, lingkup, data_version, fingerprint, cache_dir)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        PENULIS[fmt](tmp, iter_report_rows(conn, lingkup))
+        os.replace(tmp, path)
+        pola_lama = re.compile(re.escape(prefix) + r'\d+_[0-9a-f]+\.' + fmt)
+        for nama in os.listdir(cache_dir):
+            if pola_lama.fullmatch(nama) and os.path.join(cache_dir, nama) != path:
+                os.remove(os.path.join(cache_dir, nama))
+    return path
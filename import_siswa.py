@@ -0,0 +1,175 @@
+# import_siswa.py
+# Impor massal data siswa (CSV/Excel) per potongan (chunk), dengan validasi tervektorisasi.
+#
+# Penggunaan headless:
+#   python import_siswa.py data_kemenag.csv --db siswa.db --ditolak ditolak.csv
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+import scoring
+from database import NAMA_FILE_DB, get_connection, init_db
+from skema import KOLOM_DATA_SISWA, PILIHAN_BEASISWA, PILIHAN_PEKERJAAN
+
+UKURAN_CHUNK = 5000
+KOLOM_DITOLAK = ['Baris', 'NISN', 'Alasan']
+
+
+def iter_chunks(source, chunksize=UKURAN_CHUNK):
+    """Membaca file CSV atau XLSX sebagai potongan DataFrame tanpa memuat seluruh file ke memori.
+
+    source boleh berupa path atau objek file (misalnya hasil st.file_uploader) yang memiliki atribut name.
+    """
+    nama = source if isinstance(source, str) else getattr(source, 'name', '')
+    if nama.lower().endswith(('.xlsx', '.xlsm')):
+        yield from _iter_excel_chunks(source, chunksize)
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize, dtype={'NISN': str}, skipinitialspace=True)
+
+
+def _iter_excel_chunks(source, chunksize):
+    from openpyxl import load_workbook
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(col).strip() if col is not None else '' for col in next(rows, ())]
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+
+def _init_import_table(conn):
+    # Tabel sementara untuk mendeteksi NISN ganda antar-chunk tanpa menyimpan semua NISN di memori Python
+    conn.execute("DROP TABLE IF EXISTS temp.import_nisn")
+    conn.execute("CREATE TEMP TABLE import_nisn (NISN TEXT PRIMARY KEY)")
+
+
+def _nisn_terdaftar(conn, table, nisn_list):
+    """Mengembalikan himpunan NISN dari nisn_list yang sudah ada di tabel."""
+    hasil = set()
+    for i in range(0, len(nisn_list), 900):
+        batch = nisn_list[i:i + 900]
+        query = f"SELECT NISN FROM {table} WHERE NISN IN ({','.join(['?'] * len(batch))})"
+        hasil.update(row[0] for row in conn.execute(query, batch))
+    return hasil
+
+
+def validate_chunk(conn, df, baris_awal, update_existing=False):
+    """Memvalidasi satu chunk secara tervektorisasi terhadap skema data_siswa.
+
+    Mengembalikan tuple (df_valid, df_ditolak). baris_awal adalah nomor baris file untuk baris pertama chunk.
+    """
+    df = df.rename(columns=lambda col: str(col).strip())
+    kolom_hilang = [col for col in KOLOM_DATA_SISWA if col not in df.columns]
+    if kolom_hilang:
+        raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(kolom_hilang)}")
+    df = df[KOLOM_DATA_SISWA].reset_index(drop=True)
+    baris = pd.RangeIndex(baris_awal, baris_awal + len(df))
+
+    for col in ['Nama_Siswa', 'NISN', 'Kelas', 'Status_Beasiswa', 'Pekerjaan_Orang_Tua']:
+        df[col] = df[col].astype('string').str.strip()
+    df['NISN'] = df['NISN'].str.replace(r'\.0$', '', regex=True)
+    nilai = pd.to_numeric(df['Nilai_Rata_Rata_Semester'], errors='coerce')
+    absensi = pd.to_numeric(df['Jumlah_Absensi'], errors='coerce')
+    pelanggaran = pd.to_numeric(df['Riwayat_Pelanggaran'], errors='coerce')
+
+    alasan = pd.Series(pd.NA, index=df.index, dtype='string')
+
+    def tolak(mask, pesan):
+        alasan[mask.fillna(True).to_numpy() & alasan.isna().to_numpy()] = pesan
+
+    tolak(df['NISN'].isna() | (df['NISN'] == ''), "NISN kosong")
+    tolak(df['Nama_Siswa'].isna() | (df['Nama_Siswa'] == ''), "Nama_Siswa kosong")
+    tolak(df['Kelas'].isna() | (df['Kelas'] == ''), "Kelas kosong")
+    tolak(~nilai.between(0, 100), "Nilai_Rata_Rata_Semester harus 0-100")
+    tolak(~((absensi >= 0) & (absensi % 1 == 0)), "Jumlah_Absensi harus bilangan bulat >= 0")
+    tolak(~((pelanggaran >= 0) & (pelanggaran % 1 == 0)), "Riwayat_Pelanggaran harus bilangan bulat >= 0")
+    tolak(~df['Status_Beasiswa'].isin(PILIHAN_BEASISWA), f"Status_Beasiswa harus salah satu dari {', '.join(PILIHAN_BEASISWA)}")
+    tolak(~df['Pekerjaan_Orang_Tua'].isin(PILIHAN_PEKERJAAN), f"Pekerjaan_Orang_Tua harus salah satu dari {', '.join(PILIHAN_PEKERJAAN)}")
+    tolak(df['NISN'].duplicated(keep='first'), "NISN ganda dalam file")
+
+    kandidat = df.loc[alasan.isna(), 'NISN'].tolist()
+    sudah_diimpor = _nisn_terdaftar(conn, 'temp.import_nisn', kandidat)
+    tolak(df['NISN'].isin(sudah_diimpor), "NISN ganda dalam file")
+    if not update_existing:
+        tolak(df['NISN'].isin(_nisn_terdaftar(conn, 'data_siswa', kandidat)), "NISN sudah terdaftar")
+
+    valid = alasan.isna().to_numpy()
+    df_valid = df[valid].assign(Nilai_Rata_Rata_Semester=nilai[valid], Jumlah_Absensi=absensi[valid].astype(int), Riwayat_Pelanggaran=pelanggaran[valid].astype(int))
+    df_ditolak = pd.DataFrame({'Baris': baris[~valid], 'NISN': df.loc[~valid, 'NISN'].to_numpy(), 'Alasan': alasan[~valid].to_numpy()}, columns=KOLOM_DITOLAK)
+    return df_valid, df_ditolak
+
+
+def write_chunk(conn, df_valid, update_existing=False):
+    """Menulis satu chunk yang sudah valid dengan executemany dalam satu transaksi."""
+    query = f"INSERT INTO data_siswa ({', '.join(KOLOM_DATA_SISWA)}) VALUES ({', '.join(['?'] * len(KOLOM_DATA_SISWA))})"
+    if update_existing:
+        query += " ON CONFLICT(NISN) DO UPDATE SET " + ', '.join(f"{col} = excluded.{col}" for col in KOLOM_DATA_SISWA if col != 'NISN')
+    rows = list(df_valid.astype(object).itertuples(index=False, name=None))
+    with conn:
+        cursor = conn.cursor()
+        cursor.executemany(query, rows)
+        cursor.executemany("INSERT INTO temp.import_nisn (NISN) VALUES (?)", [(nisn,) for nisn in df_valid['NISN']])
+        scoring.mark_changed(conn, df_valid['NISN'], commit=False)
+
+
+def import_siswa(conn, source, chunksize=UKURAN_CHUNK, update_existing=False):
+    """Mengimpor file siswa per chunk. Menghasilkan (yield) ringkasan tiap chunk setelah ditulis.
+
+    Setiap ringkasan berisi jumlah baris 'dibaca', 'diterima', dan DataFrame 'ditolak' beserta alasannya.
+    Baris yang ditolak tidak menggagalkan chunk lain.
+    """
+    _init_import_table(conn)
+    baris_awal = 2  # baris 1 adalah header
+    for df_chunk in iter_chunks(source, chunksize):
+        df_valid, df_ditolak = validate_chunk(conn, df_chunk, baris_awal, update_existing)
+        if not df_valid.empty:
+            write_chunk(conn, df_valid, update_existing)
+        baris_awal += len(df_chunk)
+        yield {'dibaca': len(df_chunk), 'diterima': len(df_valid), 'ditolak': df_ditolak}
+    conn.execute("DROP TABLE IF EXISTS temp.import_nisn")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Impor massal data siswa dari file CSV/XLSX ke database SI PANDU.")
+    parser.add_argument('file', help="File CSV atau XLSX dengan kolom: " + ', '.join(KOLOM_DATA_SISWA))
+    parser.add_argument('--db', default=NAMA_FILE_DB, help="Path database SQLite (default: %(default)s)")
+    parser.add_argument('--chunksize', type=int, default=UKURAN_CHUNK, help="Jumlah baris per chunk (default: %(default)s)")
+    parser.add_argument('--update', action='store_true', help="Perbarui siswa yang NISN-nya sudah terdaftar, alih-alih menolaknya")
+    parser.add_argument('--ditolak', help="Tulis baris yang ditolak ke file CSV ini")
+    args = parser.parse_args(argv)
+
+    init_db(args.db)
+    conn = get_connection(args.db)
+    total_dibaca = total_diterima = total_ditolak = 0
+    try:
+        if args.ditolak and os.path.exists(args.ditolak):
+            os.remove(args.ditolak)
+        for hasil in import_siswa(conn, args.file, args.chunksize, args.update):
+            total_dibaca += hasil['dibaca']
+            total_diterima += hasil['diterima']
+            total_ditolak += len(hasil['ditolak'])
+            if args.ditolak and not hasil['ditolak'].empty:
+                hasil['ditolak'].to_csv(args.ditolak, mode='a', index=False, header=not os.path.exists(args.ditolak))
+            print(f"{total_dibaca} baris dibaca, {total_diterima} diterima, {total_ditolak} ditolak", file=sys.stderr)
+    except ValueError as e:
+        print(f"Impor dibatalkan: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
+    print(f"Selesai: {total_diterima} dari {total_dibaca} siswa diimpor, {total_ditolak} ditolak.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
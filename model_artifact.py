@@ -0,0 +1,138 @@
+# model_artifact.py
+# Artefak model tunggal berversi: estimator, parameter scaler, dan model_columns dalam satu file joblib
+# tanpa kompresi, divalidasi terhadap encoding aplikasi saat dikemas dan dimuat. Artefak tidak dimuat dengan
+# mmap_mode: array pohon sklearn tetap disalin saat objek Tree di-unpickle, sehingga memory-map hanya menambah
+# waktu muat tanpa menghemat memori.
+#
+#   python model_artifact.py pack      # membuat model_sipandu.joblib dari tiga file .pkl
+#   python model_artifact.py info      # menampilkan versi, fingerprint, ukuran, dan waktu muat
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+import scoring
+from skema import PILIHAN_PEKERJAAN
+
+FILE_ARTEFAK = 'model_sipandu.joblib'
+VERSI_FORMAT = 1
+KOLOM_NUMERIK = ['Nilai_Rata_Rata_Semester', 'Jumlah_Absensi', 'Status_Beasiswa', 'Riwayat_Pelanggaran']
+
+
+class AffineScaler:
+    """Scaler ringan hasil ekstraksi MinMaxScaler/StandardScaler: transform(X) = X * multiplier + offset."""
+
+    def __init__(self, multiplier, offset):
+        self.multiplier = multiplier
+        self.offset = offset
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        n = scaler.n_features_in_
+        if hasattr(scaler, 'min_'):  # MinMaxScaler
+            return cls(np.asarray(scaler.scale_, dtype=float), np.asarray(scaler.min_, dtype=float))
+        if hasattr(scaler, 'mean_'):  # StandardScaler
+            skala = np.ones(n) if scaler.scale_ is None else np.asarray(scaler.scale_, dtype=float)
+            rata = np.zeros(n) if scaler.mean_ is None else np.asarray(scaler.mean_, dtype=float)
+            return cls(1.0 / skala, -rata / skala)
+        raise TypeError(f"Scaler {type(scaler).__name__} tidak didukung.")
+
+    def transform(self, X):
+        return np.asarray(X, dtype=float) * self.multiplier + self.offset
+
+
+def expected_columns():
+    """Kolom yang dapat dihasilkan oleh encoding.FeatureEncoder."""
+    return KOLOM_NUMERIK + [f'Pekerjaan_Orang_Tua_{p}' for p in PILIHAN_PEKERJAAN]
+
+
+def validate_columns(model_columns):
+    """Memastikan model_columns cocok dengan encoding aplikasi. Melempar ValueError jika tidak.
+
+    Satu kategori Pekerjaan_Orang_Tua boleh tidak ada (drop_first saat pelatihan), tetapi kolom yang tidak
+    pernah dihasilkan encoding akan selalu bernilai 0 dan menandakan model dilatih dengan skema berbeda.
+    """
+    tidak_dikenal = [c for c in model_columns if c not in expected_columns()]
+    hilang = [c for c in KOLOM_NUMERIK if c not in model_columns]
+    if tidak_dikenal or hilang:
+        raise ValueError(f"model_columns tidak cocok dengan encoding aplikasi. Tidak dikenal: {tidak_dikenal or '-'}; hilang: {hilang or '-'}")
+
+
+def pack(path=FILE_ARTEFAK, sumber=scoring.FILE_MODEL):
+    """Menggabungkan model, scaler, dan model_columns menjadi satu artefak berversi."""
+    model_path, scaler_path, columns_path = sumber
+    model_columns = [str(c) for c in joblib.load(columns_path)]
+    validate_columns(model_columns)
+    scaler = AffineScaler.from_sklearn(joblib.load(scaler_path))
+    artefak = {
+        'versi_format': VERSI_FORMAT,
+        'estimator': joblib.load(model_path),
+        'scaler_multiplier': scaler.multiplier,
+        'scaler_offset': scaler.offset,
+        'model_columns': model_columns,
+        # Fingerprint file sumber; artefak diabaikan jika file .pkl diganti setelah pack
+        'sumber_fingerprint': scoring.model_fingerprint(sumber),
+        'dibuat': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    tmp = f"{path}.tmp"
+    joblib.dump(artefak, tmp, compress=0)
+    os.replace(tmp, path)
+    return path
+
+
+def load_models(path=FILE_ARTEFAK, sumber=scoring.FILE_MODEL):
+    """Memuat (model, scaler, model_columns, info), mengutamakan artefak tunggal jika masih sesuai dengan file sumber.
+
+    info berisi 'format', 'fingerprint', 'ukuran' (byte), dan 'detik' (waktu muat). Mengembalikan
+    (None, None, None, None) jika tidak ada file model sama sekali.
+    """
+    mulai = time.perf_counter()
+    sumber_fingerprint = scoring.model_fingerprint(sumber)
+    if os.path.exists(path):
+        artefak = joblib.load(path)
+        if artefak.get('versi_format') == VERSI_FORMAT and (sumber_fingerprint is None or artefak['sumber_fingerprint'] == sumber_fingerprint):
+            validate_columns(artefak['model_columns'])
+            # Fingerprint model = fingerprint file sumber, sehingga pack ulang atau beralih antara artefak dan
+            # file .pkl untuk model yang sama tidak membuat skor, laporan, dan rekomendasi tersimpan menjadi usang
+            info = {'format': f"artefak v{VERSI_FORMAT}", 'fingerprint': artefak['sumber_fingerprint'],
+                    'ukuran': os.path.getsize(path), 'detik': time.perf_counter() - mulai}
+            return artefak['estimator'], AffineScaler(artefak['scaler_multiplier'], artefak['scaler_offset']), artefak['model_columns'], info
+    if sumber_fingerprint is None:
+        return None, None, None, None
+    model_path, scaler_path, columns_path = sumber
+    model, scaler, model_columns = joblib.load(model_path), joblib.load(scaler_path), joblib.load(columns_path)
+    validate_columns(list(model_columns))
+    info = {'format': "pickle terpisah", 'fingerprint': sumber_fingerprint,
+            'ukuran': sum(os.path.getsize(p) for p in sumber), 'detik': time.perf_counter() - mulai}
+    return model, scaler, model_columns, info
+
+
+def files_fingerprint(path=FILE_ARTEFAK, sumber=scoring.FILE_MODEL):
+    """Kunci cache yang berubah jika artefak atau salah satu file .pkl berubah, tanpa memuat model."""
+    return f"{scoring.model_fingerprint(sumber)}:{scoring.model_fingerprint((path,))}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mengemas dan memeriksa artefak model SI PANDU.")
+    parser.add_argument('perintah', choices=['pack', 'info'])
+    parser.add_argument('--artefak', default=FILE_ARTEFAK)
+    args = parser.parse_args(argv)
+
+    if args.perintah == 'pack':
+        pack(args.artefak)
+        print(f"Artefak ditulis ke {args.artefak} ({os.path.getsize(args.artefak) / 1024:.0f} KB).")
+    model, _, model_columns, info = load_models(args.artefak)
+    if model is None:
+        print("File model tidak ditemukan.", file=sys.stderr)
+        return 1
+    print(f"Format: {info['format']}\nFingerprint: {info['fingerprint']}\nUkuran: {info['ukuran'] / 1024:.0f} KB\n"
+          f"Waktu muat: {info['detik'] * 1000:.1f} ms\nEstimator: {type(model).__name__}\nKolom: {', '.join(model_columns)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# profil.py
+# Panel waktu & memori per rerun dasbor (opsional). Aktifkan dengan variabel lingkungan SIPANDU_PROFIL=1;
+# setiap rerun juga dicatat ke .cache/profil_rerun.csv untuk membandingkan antarversi.
+
+import csv
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+FILE_LOG = os.path.join('.cache', 'profil_rerun.csv')
+
+
+def profil_aktif():
+    return os.environ.get('SIPANDU_PROFIL') == '1'
+
+
+class ProfilRerun:
+    """Mencatat durasi dan alokasi memori (tracemalloc) setiap tahap dalam satu rerun.
+
+    tracemalloc bersifat global untuk proses, jadi sekali dinyalakan ia dibiarkan aktif, dan angka memori ikut
+    mencakup sesi lain yang berjalan bersamaan. Tahap tidak boleh bersarang karena puncak memori di-reset per tahap.
+    Jika tidak aktif, tahap() tidak melakukan apa pun.
+    """
+
+    def __init__(self, aktif=None):
+        self.aktif = profil_aktif() if aktif is None else aktif
+        self.tahap_tercatat = []
+        self._mulai = time.perf_counter()
+        if self.aktif and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def tahap(self, nama):
+        if not self.aktif:
+            yield
+            return
+        tracemalloc.reset_peak()
+        memori_awal = tracemalloc.get_traced_memory()[0]
+        mulai = time.perf_counter()
+        try:
+            yield
+        finally:
+            detik = time.perf_counter() - mulai
+            memori_akhir, puncak = tracemalloc.get_traced_memory()
+            self.tahap_tercatat.append({'Tahap': nama, 'Waktu (ms)': detik * 1000, 'Puncak Memori (MiB)': (puncak - memori_awal) / 2**20,
+                                        'Sisa Alokasi (MiB)': (memori_akhir - memori_awal) / 2**20})
+
+    def render(self, log_path=FILE_LOG):
+        """Menampilkan panel profil di sidebar dan menambahkan baris rerun ini ke file log CSV."""
+        if not self.aktif:
+            return
+        total = (time.perf_counter() - self._mulai) * 1000
+        df = pd.DataFrame(self.tahap_tercatat)
+        with st.sidebar.expander("⏱️ Profil Rerun", expanded=True):
+            st.metric("Total rerun", f"{total:.0f} ms")
+            st.dataframe(df, hide_index=True, use_container_width=True,
+                         column_config={kolom: st.column_config.NumberColumn(format="%.1f") for kolom in df.columns[1:]})
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        baru = not os.path.exists(log_path)
+        waktu = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(log_path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            if baru:
+                writer.writerow(['waktu', 'tahap', 'ms', 'puncak_mib'])
+            for baris in self.tahap_tercatat:
+                writer.writerow([waktu, baris['Tahap'], f"{baris['Waktu (ms)']:.2f}", f"{baris['Puncak Memori (MiB)']:.3f}"])
+            writer.writerow([waktu, 'total', f"{total:.2f}", ''])
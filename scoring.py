@@ -0,0 +1,225 @@
+# scoring.py
+# Lapisan skor risiko yang dipersistenkan: hanya siswa yang berubah yang dihitung ulang.
+
+import hashlib
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+FILE_MODEL = ('model_prediksi.pkl', 'scaler.pkl', 'model_columns.pkl')
+KOLOM_IDENTITAS = ['Nama_Siswa', 'NISN', 'Kelas']
+AMBANG_RISIKO_TINGGI = 70  # persen; batas 'Siswa Berisiko Tinggi' di dasbor analitik
+# Fitur mentah yang diberi atribusi model, beserta labelnya; kontribusinya disimpan di risk_score.kontribusi_<fitur>
+FAKTOR_MODEL = {'Jumlah_Absensi': 'Tingkat Absensi', 'Nilai_Rata_Rata_Semester': 'Nilai Akademik', 'Riwayat_Pelanggaran': 'Perilaku/Disiplin',
+                'Status_Beasiswa': 'Status Beasiswa', 'Pekerjaan_Orang_Tua': 'Latar Pekerjaan Orang Tua'}
+KOLOM_KONTRIBUSI = {fitur: f'kontribusi_{fitur}' for fitur in FAKTOR_MODEL}
+BATAS_KONTRIBUSI = 5.0  # poin persen; fitur yang menaikkan risiko minimal sebesar ini dianggap faktor risiko utama
+# Tingkat risiko (batas bawah inklusif, batas atas eksklusif), sama dengan label Mode Simulasi
+BAND_RISIKO = {'Prioritas Utama': (75, 101), 'Perhatian Khusus': (50, 75), 'Waspada': (25, 50), 'Aman': (0, 25)}
+
+# Cache fingerprint per file, dikunci dengan (mtime, ukuran) agar file tidak di-hash ulang setiap rerun.
+_fingerprint_cache = {}
+
+
+def model_fingerprint(paths=FILE_MODEL):
+    """Menghitung sidik jari (SHA-256) gabungan dari file-file model. Mengembalikan None jika ada file yang hilang."""
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        kunci = (stat.st_mtime_ns, stat.st_size)
+        cached = _fingerprint_cache.get(path)
+        if cached is None or cached[0] != kunci:
+            with open(path, 'rb') as f:
+                cached = (kunci, hashlib.sha256(f.read()).hexdigest())
+            _fingerprint_cache[path] = cached
+        digest.update(cached[1].encode())
+    return digest.hexdigest()[:16]
+
+
+def init_scoring_db(conn):
+    """Memastikan tabel skor risiko, versi baris, dan metadata ada di database."""
+    cursor = conn.cursor()
+    cursor.execute("""CREATE TABLE IF NOT EXISTS risk_score (NISN TEXT PRIMARY KEY, risk_score REAL NOT NULL, row_version INTEGER NOT NULL, model_fingerprint TEXT NOT NULL, scored_at TEXT NOT NULL)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS data_siswa_versi (NISN TEXT PRIMARY KEY, row_version INTEGER NOT NULL)""")
+    cursor.execute("""CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value TEXT)""")
+    conn.commit()
+
+
+def mark_changed(conn, nisn_list, commit=True):
+    """Menaikkan versi baris untuk NISN yang ditambah/diubah agar dihitung ulang pada rerun berikutnya."""
+    rows = [(str(nisn),) for nisn in nisn_list]
+    if not rows:
+        return
+    cursor = conn.cursor()
+    cursor.executemany("INSERT INTO data_siswa_versi (NISN, row_version) VALUES (?, 1) ON CONFLICT(NISN) DO UPDATE SET row_version = row_version + 1", rows)
+    _bump_data_version(cursor)
+    if commit:
+        conn.commit()
+
+
+def forget(conn, nisn_list, commit=True):
+    """Menghapus skor dan versi baris untuk NISN yang sudah dihapus dari data_siswa."""
+    rows = [(str(nisn),) for nisn in nisn_list]
+    if not rows:
+        return
+    cursor = conn.cursor()
+    cursor.executemany("DELETE FROM risk_score WHERE NISN = ?", rows)
+    cursor.executemany("DELETE FROM data_siswa_versi WHERE NISN = ?", rows)
+    _bump_data_version(cursor)
+    if commit:
+        conn.commit()
+
+
+def _bump_data_version(cursor):
+    cursor.execute("INSERT INTO app_meta (key, value) VALUES ('data_version', '1') ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+
+def get_data_version(conn):
+    """Mengembalikan nomor versi data siswa; naik setiap kali ada baris yang ditambah, diubah, atau dihapus."""
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'data_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def key_factors(skor_siswa):
+    """Mengembalikan faktor risiko utama seorang siswa menurut atribusi model, dari kontribusi terbesar.
+
+    skor_siswa adalah baris dengan kolom kontribusi_<fitur> (lihat daftar_siswa.get_student dan batch_rekomendasi.select_cohort).
+    """
+    kontribusi = sorted(((skor_siswa[kolom], fitur) for fitur, kolom in KOLOM_KONTRIBUSI.items()), reverse=True)
+    faktor = [f"{FAKTOR_MODEL[fitur]} (+{nilai:.1f} poin risiko)" for nilai, fitur in kontribusi if nilai >= BATAS_KONTRIBUSI]
+    return faktor or ["Tidak ada faktor risiko menonjol"]
+
+
+def init_history_db(conn):
+    """Menambahkan hash fitur pada risk_score dan membuat tabel riwayat skor risk_history (append-only).
+
+    risk_history dikelompokkan per (NISN, recorded_at) sebagai WITHOUT ROWID sehingga tren seorang siswa
+    adalah satu range scan; indeks (Kelas, recorded_at) melayani tren satu kelas. Kolom periode (YYYY-MM)
+    adalah kunci partisi waktu untuk agregasi bulanan.
+    """
+    kolom = [row[1] for row in conn.execute("PRAGMA table_info(risk_score)")]
+    if 'features_hash' not in kolom:
+        conn.execute("ALTER TABLE risk_score ADD COLUMN features_hash TEXT")
+    conn.execute("""CREATE TABLE IF NOT EXISTS risk_history (NISN TEXT NOT NULL, recorded_at TEXT NOT NULL, periode TEXT NOT NULL, Kelas TEXT, features_hash TEXT NOT NULL, risk_score REAL NOT NULL, model_version TEXT NOT NULL, PRIMARY KEY (NISN, recorded_at)) WITHOUT ROWID""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_risk_history_kelas ON risk_history (Kelas, recorded_at)")
+    conn.commit()
+
+
+def init_attribution_db(conn):
+    """Menambahkan kolom kontribusi faktor (atribusi model) pada risk_score; skor lama akan dihitung ulang."""
+    kolom = [row[1] for row in conn.execute("PRAGMA table_info(risk_score)")]
+    for nama in KOLOM_KONTRIBUSI.values():
+        if nama not in kolom:
+            conn.execute(f"ALTER TABLE risk_score ADD COLUMN {nama} REAL")
+    conn.commit()
+
+
+def features_hash(df):
+    """Menghitung hash per baris dari kolom fitur mentah (tanpa identitas), secara tervektorisasi."""
+    kolom_fitur = [c for c in df.columns if c not in KOLOM_IDENTITAS]
+    return [f"{h:016x}" for h in pd.util.hash_pandas_object(df[kolom_fitur], index=False)]
+
+
+def refresh_scores(conn, explainer, fingerprint):
+    """Menghitung ulang skor dan atribusi faktor hanya untuk siswa yang baru, berubah, atau dinilai dengan model lama.
+
+    explainer adalah attribution.ModelExplainer milik model. Jika fitur atau skor seorang siswa berubah, satu baris
+    baru ditambahkan ke risk_history. Pasangan (data_version, fingerprint) yang terakhir selesai dinilai disimpan di
+    app_meta, sehingga rerun tanpa perubahan data maupun model selesai dengan satu pembacaan kunci.
+    Mengembalikan jumlah siswa yang dihitung ulang.
+    """
+    # Versi dibaca sebelum pemindaian: perubahan yang masuk selama penilaian membuat penanda tidak cocok pada rerun berikutnya
+    penanda = f"{get_data_version(conn)}:{fingerprint}"
+    row = conn.execute("SELECT value FROM app_meta WHERE key = 'skor_terakhir'").fetchone()
+    if row and row[0] == penanda:
+        return 0
+    df_stale = pd.read_sql(
+        """SELECT d.*, COALESCE(v.row_version, 0) AS _row_version, r.features_hash AS _hash_lama, r.risk_score AS _skor_lama
+           FROM data_siswa d
+           LEFT JOIN data_siswa_versi v ON v.NISN = d.NISN
+           LEFT JOIN risk_score r ON r.NISN = d.NISN
+           WHERE r.NISN IS NULL OR r.model_fingerprint <> ? OR r.row_version <> COALESCE(v.row_version, 0)
+              OR r.kontribusi_Jumlah_Absensi IS NULL""",
+        conn, params=(fingerprint,))
+    if df_stale.empty:
+        _set_scored_marker(conn.cursor(), penanda)
+        conn.commit()
+        return 0
+    df_raw = df_stale.drop(columns=['_row_version', '_hash_lama', '_skor_lama'])
+    risk_scores, kontribusi = explainer.explain(df_raw)
+    hashes = features_hash(df_raw)
+    sekarang = datetime.now()
+    scored_at = sekarang.strftime('%Y-%m-%d %H:%M:%S')
+    rows = [(str(nisn), float(skor), int(versi), fingerprint, scored_at, h, *k)
+            for nisn, skor, versi, h, k in zip(df_stale['NISN'], risk_scores, df_stale['_row_version'], hashes, kontribusi.tolist())]
+    berubah = (df_stale['_hash_lama'].to_numpy() != hashes) | ~np.isclose(df_stale['_skor_lama'].to_numpy(dtype=float), risk_scores)
+    # recorded_at beresolusi mikrodetik agar dua perubahan dalam detik yang sama tetap menjadi dua baris riwayat
+    recorded_at = sekarang.strftime('%Y-%m-%d %H:%M:%S.%f')
+    history = [(str(nisn), recorded_at, sekarang.strftime('%Y-%m'), kelas, h, float(skor), fingerprint)
+               for nisn, kelas, h, skor in zip(df_stale['NISN'][berubah], df_stale['Kelas'][berubah], np.asarray(hashes)[berubah], risk_scores[berubah])]
+    cursor = conn.cursor()
+    kolom_kontribusi = list(KOLOM_KONTRIBUSI.values())
+    cursor.executemany(f"""INSERT INTO risk_score (NISN, risk_score, row_version, model_fingerprint, scored_at, features_hash, {', '.join(kolom_kontribusi)})
+                           VALUES ({', '.join('?' * (6 + len(kolom_kontribusi)))})
+                           ON CONFLICT(NISN) DO UPDATE SET risk_score = excluded.risk_score, row_version = excluded.row_version,
+                           model_fingerprint = excluded.model_fingerprint, scored_at = excluded.scored_at, features_hash = excluded.features_hash,
+                           {', '.join(f'{k} = excluded.{k}' for k in kolom_kontribusi)}""", rows)
+    cursor.executemany("INSERT INTO risk_history (NISN, recorded_at, periode, Kelas, features_hash, risk_score, model_version) VALUES (?, ?, ?, ?, ?, ?, ?)", history)
+    _set_scored_marker(cursor, penanda)
+    conn.commit()
+    return len(rows)
+
+
+def _set_scored_marker(cursor, penanda):
+    cursor.execute("INSERT INTO app_meta (key, value) VALUES ('skor_terakhir', ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (penanda,))
+
+
+def read_student_history(conn, nisn, sejak='0000'):
+    """Membaca riwayat skor seorang siswa (satu range scan pada kunci utama)."""
+    return pd.read_sql("SELECT recorded_at, risk_score FROM risk_history WHERE NISN = ? AND recorded_at >= ? ORDER BY recorded_at",
+                       conn, params=(str(nisn), sejak))
+
+
+def read_class_history(conn, kelas, sejak='0000'):
+    """Membaca rata-rata risiko per bulan untuk satu kelas, dari skor terakhir setiap siswa pada akhir bulan itu.
+
+    Riwayat hanya ditulis saat fitur atau skor seorang siswa berubah, jadi skor dan kelas terakhir setiap siswa
+    dibawa ke bulan-bulan berikutnya sebelum dirata-rata; bulan tanpa perubahan tetap muncul. Siswa yang pindah
+    kelas dihitung di kelas lama hanya sampai bulan kepindahannya, dan siswa yang sudah dihapus dari data_siswa
+    hanya sampai bulan baris riwayat terakhirnya.
+    """
+    df = pd.read_sql("""SELECT NISN, periode, Kelas, risk_score, NISN IN (SELECT NISN FROM data_siswa) AS aktif FROM (
+                            SELECT NISN, periode, Kelas, risk_score,
+                                   ROW_NUMBER() OVER (PARTITION BY NISN, periode ORDER BY recorded_at DESC) AS urutan
+                            FROM risk_history
+                            WHERE NISN IN (SELECT NISN FROM risk_history WHERE Kelas = ?))
+                        WHERE urutan = 1""", conn, params=(kelas,))
+    if df.empty:
+        return pd.DataFrame({'periode': pd.Series(dtype=str), 'risk_score': pd.Series(dtype=float), 'jumlah_siswa': pd.Series(dtype=int)})
+    akhir = max(df['periode'].max(), datetime.now().strftime('%Y-%m'))
+    semua_periode = pd.period_range(df['periode'].min(), akhir, freq='M').strftime('%Y-%m')
+    skor = df.pivot(index='periode', columns='NISN', values='risk_score').reindex(semua_periode).ffill()
+    kelas_siswa = df.pivot(index='periode', columns='NISN', values='Kelas').reindex(semua_periode).ffill()
+    terakhir = df.groupby('NISN').agg(periode=('periode', 'max'), aktif=('aktif', 'max')).reindex(skor.columns)
+    sudah_pergi = (skor.index.to_numpy()[:, None] > terakhir['periode'].to_numpy()[None, :]) & (terakhir['aktif'].to_numpy() == 0)
+    skor = skor.where((kelas_siswa == kelas) & ~sudah_pergi)
+    hasil = pd.DataFrame({'risk_score': skor.mean(axis=1), 'jumlah_siswa': skor.count(axis=1)}).rename_axis('periode').reset_index()
+    return hasil[(hasil['periode'] >= sejak[:7]) & (hasil['jumlah_siswa'] > 0)].reset_index(drop=True)
+
+
+def risk_delta_since(conn, sejak):
+    """Menghitung perubahan skor setiap siswa dibandingkan skor terakhirnya sebelum/pada waktu `sejak`.
+
+    Hanya membaca riwayat tersimpan; model tidak dijalankan ulang. Siswa tanpa riwayat sebelum `sejak`
+    memiliki skor_sebelumnya NaN.
+    """
+    return pd.read_sql("""SELECT *, skor_sekarang - skor_sebelumnya AS delta FROM (
+                              SELECT d.Nama_Siswa, d.NISN, d.Kelas, r.risk_score AS skor_sekarang,
+                                     (SELECT h.risk_score FROM risk_history h WHERE h.NISN = r.NISN AND h.recorded_at <= ?
+                                      ORDER BY h.recorded_at DESC LIMIT 1) AS skor_sebelumnya
+                              FROM risk_score r JOIN data_siswa d ON d.NISN = r.NISN)""", conn, params=(sejak,))
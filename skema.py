@@ -0,0 +1,7 @@
+# skema.py
+# Kolom data_siswa dan pilihan kategorinya. Modul ini tidak mengimpor modul aplikasi lain, sehingga encoding,
+# artefak model, dan impor massal dapat memakainya tanpa ikut memuat lapisan database.
+
+KOLOM_DATA_SISWA = ['Nama_Siswa', 'NISN', 'Kelas', 'Nilai_Rata_Rata_Semester', 'Jumlah_Absensi', 'Status_Beasiswa', 'Pekerjaan_Orang_Tua', 'Riwayat_Pelanggaran']
+PILIHAN_BEASISWA = ('Ya', 'Tidak')
+PILIHAN_PEKERJAAN = ('PNS', 'Wiraswasta', 'Buruh', 'Petani', 'Lainnya')
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_connection, init_db  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'siswa.db')
+    init_db(path)
+    return path
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = get_connection(db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope='session')
+def explainer():
+    """ModelExplainer untuk RandomForest kecil yang dilatih pada data acak, dengan kolom seperti model asli."""
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    from attribution import ModelExplainer
+    from encoding import FeatureEncoder
+
+    kolom = ['Nilai_Rata_Rata_Semester', 'Jumlah_Absensi', 'Status_Beasiswa', 'Riwayat_Pelanggaran',
+             'Pekerjaan_Orang_Tua_Lainnya', 'Pekerjaan_Orang_Tua_PNS', 'Pekerjaan_Orang_Tua_Petani', 'Pekerjaan_Orang_Tua_Wiraswasta']
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(40, 100, 500), rng.integers(0, 30, 500), rng.integers(0, 2, 500), rng.integers(0, 100, 500),
+                         np.eye(5)[rng.integers(0, 5, 500)][:, 1:]])
+    y = X[:, 1] / 30 + X[:, 3] / 100 - X[:, 0] / 100 + rng.normal(0, 0.2, 500) > 0.2
+    scaler = MinMaxScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(scaler.transform(X), y.astype(int))
+    return ModelExplainer(model, FeatureEncoder(kolom, scaler))
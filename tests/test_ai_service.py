@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from ai_service import AIService, StubBackend
+from database import ConnectionPool
+
+
+class BackendGagal(StubBackend):
+    """StubBackend yang melempar error pada `gagal` panggilan pertama, setelah mengirim `terkirim` kata."""
+
+    def __init__(self, gagal, terkirim=0, **kwargs):
+        super().__init__(**kwargs)
+        self.gagal = gagal
+        self.terkirim = terkirim
+
+    def stream(self, prompt, timeout):
+        gagal = self.calls < self.gagal
+        for i, kata in enumerate(super().stream(prompt, timeout)):
+            if gagal and i == self.terkirim:
+                raise ConnectionError("koneksi terputus")
+            yield kata
+        if gagal:
+            raise ConnectionError("koneksi terputus")
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, size=2)
+    yield pool
+    pool.close()
+
+
+def buat_service(backend, pool, **kwargs):
+    return AIService(backend, pool, timeout=5.0, backoff=0.0, **kwargs)
+
+
+def test_permintaan_identik_yang_berjalan_digabung(pool):
+    backend = StubBackend("satu dua tiga", delay=0.05)
+    service = buat_service(backend, pool)
+    job = service.submit("prompt")
+    assert service.submit("prompt") is job
+    assert job.result(timeout=5) == "satu dua tiga "
+    assert backend.calls == 1
+
+
+def test_hasil_tersimpan_dipakai_tanpa_memanggil_backend(pool):
+    backend = StubBackend("jawaban")
+    service = buat_service(backend, pool)
+    service.submit("prompt").result(timeout=5)
+    job = service.submit("prompt")
+    assert job.done and job.text == "jawaban "
+    assert backend.calls == 1
+
+
+def test_cache_kedaluwarsa_setelah_ttl(pool):
+    service = buat_service(StubBackend(), pool, ttl=60)
+    with pool.connection() as conn:
+        conn.executemany("INSERT INTO ai_cache (key, response, created_at) VALUES (?, ?, ?)",
+                         [('baru', "masih berlaku", time.time() - 30), ('lama', "kedaluwarsa", time.time() - 120)])
+        conn.commit()
+    assert service.get_cached('baru') == "masih berlaku"
+    assert service.get_cached('lama') is None
+    assert service.lookup('lama') is None
+
+
+def test_retry_jika_gagal_sebelum_teks_pertama(pool):
+    backend = BackendGagal(gagal=2, response="akhirnya berhasil")
+    service = buat_service(backend, pool, retries=3)
+    assert service.submit("prompt").result(timeout=5) == "akhirnya berhasil "
+    assert backend.calls == 3
+
+
+def test_tidak_retry_setelah_teks_parsial_terkirim(pool):
+    backend = BackendGagal(gagal=1, terkirim=1, response="teks parsial lalu putus")
+    service = buat_service(backend, pool, retries=3)
+    job = service.submit("prompt")
+    with pytest.raises(ConnectionError):
+        job.result(timeout=5)
+    assert job.text == "teks "
+    assert backend.calls == 1
+    assert service.get_cached(job.key) is None
+
+
+def test_error_setelah_retry_habis_diteruskan(pool):
+    backend = BackendGagal(gagal=5)
+    service = buat_service(backend, pool, retries=2)
+    with pytest.raises(ConnectionError):
+        service.submit("prompt").result(timeout=5)
+    assert backend.calls == 2
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import scoring
+from skema import PILIHAN_PEKERJAAN
+
+KELAS = ['X IPA 1', 'X IPS 2', 'XI MIPA 3']
+
+
+def faktor_referensi(df):
+    """Kondisi faktor risiko per siswa, dihitung langsung dari kolom kontribusi seperti scoring.key_factors."""
+    return {scoring.FAKTOR_MODEL[fitur]: df[kolom] >= scoring.BATAS_KONTRIBUSI for fitur, kolom in scoring.KOLOM_KONTRIBUSI.items()}
+
+
+@pytest.fixture
+def siswa(conn):
+    rng = np.random.default_rng(1)
+    n = 60
+    df = pd.DataFrame({'Nama_Siswa': [f"Siswa {i}" for i in range(n)], 'NISN': [f"{i:010d}" for i in range(n)],
+                       'Kelas': rng.choice(KELAS, n), 'Nilai_Rata_Rata_Semester': rng.uniform(40, 100, n).round(1),
+                       'Jumlah_Absensi': rng.integers(0, 30, n), 'Status_Beasiswa': rng.choice(['Ya', 'Tidak'], n),
+                       'Pekerjaan_Orang_Tua': rng.choice(PILIHAN_PEKERJAAN, n), 'Riwayat_Pelanggaran': rng.integers(0, 100, n),
+                       'risk_score': rng.uniform(0, 100, n)})
+    for kolom in scoring.KOLOM_KONTRIBUSI.values():
+        df[kolom] = rng.uniform(-10, 15, n)
+    kolom_siswa = list(df.columns[:8])
+    df[kolom_siswa].to_sql('data_siswa', conn, if_exists='append', index=False)
+    skor = df[['NISN', 'risk_score', *scoring.KOLOM_KONTRIBUSI.values()]].assign(row_version=0, model_fingerprint='uji', scored_at='2026-01-01')
+    skor.to_sql('risk_score', conn, if_exists='append', index=False)
+    # Siswa tanpa skor tidak ikut dihitung
+    conn.execute("INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas, Pekerjaan_Orang_Tua) VALUES ('Belum Dinilai', '9999999999', 'X IPA 1', 'PNS')")
+    conn.commit()
+    return df
+
+
+def ringkasan_referensi(df, ambang):
+    tinggi = df['risk_score'] >= ambang
+    hasil = {'jumlah_siswa': len(df), 'rata_rata_risiko': df['risk_score'].mean() if len(df) else 0.0, 'berisiko_tinggi': tinggi.sum()}
+    hasil.update({label: (tinggi & kondisi).sum() for label, kondisi in faktor_referensi(df).items()})
+    hasil['persen_berisiko_tinggi'] = hasil['berisiko_tinggi'] / len(df) if len(df) else 0.0
+    return hasil
+
+
+def cocokkan(baris, referensi):
+    for kolom, nilai in referensi.items():
+        assert baris[kolom] == pytest.approx(nilai), kolom
+
+
+def saring(df, filter_dimensi, filter_nilai):
+    return df if filter_dimensi is None else df[df[analytics.DIMENSI[filter_dimensi]] == filter_nilai]
+
+
+DRILL_DOWN = [(None, None), ('Kelas', 'X IPS 2'), ('Pekerjaan Orang Tua', 'Petani'), ('Kelas', 'Tidak Ada')]
+
+
+@pytest.mark.parametrize('ambang', [scoring.AMBANG_RISIKO_TINGGI, 40])
+@pytest.mark.parametrize('filter_dimensi, filter_nilai', DRILL_DOWN)
+def test_school_summary(conn, siswa, ambang, filter_dimensi, filter_nilai):
+    baris = analytics.school_summary(conn, ambang, filter_dimensi, filter_nilai)
+    cocokkan(baris, ringkasan_referensi(saring(siswa, filter_dimensi, filter_nilai), ambang))
+
+
+@pytest.mark.parametrize('dimensi', list(analytics.DIMENSI))
+@pytest.mark.parametrize('filter_dimensi, filter_nilai', DRILL_DOWN)
+def test_risk_by_group(conn, siswa, dimensi, filter_dimensi, filter_nilai):
+    df = saring(siswa, filter_dimensi, filter_nilai)
+    hasil = analytics.risk_by_group(conn, dimensi, filter_dimensi=filter_dimensi, filter_nilai=filter_nilai)
+    kelompok = df.groupby(analytics.DIMENSI[dimensi])
+    urutan = kelompok['risk_score'].mean().sort_values(ascending=False).index
+    assert list(hasil.index) == list(urutan)
+    for nilai, anggota in kelompok:
+        cocokkan(hasil.loc[nilai], ringkasan_referensi(anggota, scoring.AMBANG_RISIKO_TINGGI))
+
+
+@pytest.mark.parametrize('filter_dimensi, filter_nilai', DRILL_DOWN)
+@pytest.mark.parametrize('limit', [100, 3])
+def test_high_risk_students(conn, siswa, filter_dimensi, filter_nilai, limit):
+    df = saring(siswa, filter_dimensi, filter_nilai)
+    referensi = df[df['risk_score'] >= scoring.AMBANG_RISIKO_TINGGI].sort_values('risk_score', ascending=False).head(limit)
+    hasil = analytics.high_risk_students(conn, filter_dimensi=filter_dimensi, filter_nilai=filter_nilai, limit=limit)
+    assert list(hasil['NISN']) == list(referensi['NISN'])
+    assert list(hasil['Tingkat Risiko (%)']) == pytest.approx(list(referensi['risk_score']))
+    assert list(hasil['Kelas']) == list(referensi['Kelas'])
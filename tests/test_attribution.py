@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.tree import DecisionTreeClassifier
+
+import attribution
+from attribution import ModelExplainer
+from encoding import FeatureEncoder
+from scoring import FAKTOR_MODEL
+from skema import PILIHAN_PEKERJAAN
+
+# Sama dengan pelatihan model asli: pd.get_dummies(drop_first=True), sehingga 'Buruh' tidak punya kolom
+MODEL_COLUMNS = ['Nilai_Rata_Rata_Semester', 'Jumlah_Absensi', 'Status_Beasiswa', 'Riwayat_Pelanggaran',
+                 'Pekerjaan_Orang_Tua_Lainnya', 'Pekerjaan_Orang_Tua_PNS', 'Pekerjaan_Orang_Tua_Petani', 'Pekerjaan_Orang_Tua_Wiraswasta']
+
+
+def data_siswa(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Nama_Siswa': "Siswa", 'NISN': [f"{i:05d}" for i in range(n)], 'Kelas': "X MIPA 1",
+                         'Nilai_Rata_Rata_Semester': rng.uniform(40, 100, n).round(2), 'Jumlah_Absensi': rng.integers(0, 30, n),
+                         'Status_Beasiswa': rng.choice(['Ya', 'Tidak'], n), 'Pekerjaan_Orang_Tua': rng.choice(PILIHAN_PEKERJAAN, n),
+                         'Riwayat_Pelanggaran': rng.integers(0, 100, n)})
+
+
+def latih(model):
+    df = data_siswa(400, seed=0)
+    X_mentah = np.column_stack([df['Nilai_Rata_Rata_Semester'], df['Jumlah_Absensi'], df['Status_Beasiswa'] == 'Ya', df['Riwayat_Pelanggaran']]
+                               + [df['Pekerjaan_Orang_Tua'] == kolom.removeprefix('Pekerjaan_Orang_Tua_') for kolom in MODEL_COLUMNS[4:]]).astype(float)
+    scaler = MinMaxScaler().fit(X_mentah)
+    y = (df['Jumlah_Absensi'] / 30 + df['Riwayat_Pelanggaran'] / 100 - df['Nilai_Rata_Rata_Semester'] / 100
+         + (df['Pekerjaan_Orang_Tua'] == 'Buruh') * 0.3 + np.random.default_rng(1).normal(0, 0.2, len(df))) > 0.2
+    model.fit(scaler.transform(X_mentah), y.astype(int))
+    encoder = FeatureEncoder(MODEL_COLUMNS, scaler)
+    return model, encoder
+
+
+def kontribusi_jalur(model, X):
+    """Acuan langsung: telusuri jalur setiap baris lewat decision_path dan kreditkan setiap pergeseran ke fitur induk."""
+    pohon = [e.tree_ for e in model.estimators_] if hasattr(model, 'estimators_') else [model.tree_]
+    hasil = np.zeros(X.shape)
+    for tree in pohon:
+        p = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1)
+        jalur = tree.decision_path(X.astype(np.float32)).tocsr()
+        for i in range(len(X)):
+            simpul = jalur.indices[jalur.indptr[i]:jalur.indptr[i + 1]]
+            for induk, anak in zip(simpul[:-1], simpul[1:]):
+                hasil[i, tree.feature[induk]] += p[anak] - p[induk]
+    return hasil * 100 / len(pohon)
+
+
+MODEL_POHON = [RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0), DecisionTreeClassifier(max_depth=5, random_state=0)]
+
+
+@pytest.mark.parametrize('model', MODEL_POHON, ids=['random_forest', 'decision_tree'])
+def test_bias_ditambah_kontribusi_sama_dengan_predict_proba(model):
+    model, encoder = latih(model)
+    df = data_siswa(300, seed=2)
+    risiko, kontribusi = ModelExplainer(model, encoder).explain(df)
+    proba = model.predict_proba(encoder.transform(df))[:, 1] * 100
+    assert kontribusi.shape == (len(df), len(FAKTOR_MODEL))
+    np.testing.assert_allclose(risiko, proba, atol=1e-9)
+    np.testing.assert_allclose(ModelExplainer(model, encoder)._bias + kontribusi.sum(axis=1), proba, atol=1e-9)
+
+
+@pytest.mark.parametrize('model', MODEL_POHON, ids=['random_forest', 'decision_tree'])
+def test_kontribusi_sama_dengan_penelusuran_jalur(model):
+    model, encoder = latih(model)
+    df = data_siswa(25, seed=3)
+    _, kontribusi = ModelExplainer(model, encoder).explain(df)
+    acuan = kontribusi_jalur(model, encoder.transform(df))
+    # Kolom one-hot Pekerjaan_Orang_Tua_* dijumlahkan menjadi satu faktor, sesuai urutan FAKTOR_MODEL
+    acuan_faktor = np.column_stack([acuan[:, [i for i, kolom in enumerate(MODEL_COLUMNS) if kolom == fitur or kolom.startswith(f'{fitur}_')]].sum(axis=1)
+                                    for fitur in FAKTOR_MODEL])
+    np.testing.assert_allclose(kontribusi, acuan_faktor, atol=1e-9)
+
+
+def test_hasil_tidak_bergantung_pada_ukuran_potongan(monkeypatch):
+    model, encoder = latih(MODEL_POHON[0])
+    df = data_siswa(100, seed=4)
+    explainer = ModelExplainer(model, encoder)
+    risiko, kontribusi = explainer.explain(df)
+    monkeypatch.setattr(attribution, 'UKURAN_POTONGAN', 7)
+    risiko_potong, kontribusi_potong = explainer.explain(df)
+    np.testing.assert_allclose(risiko_potong, risiko)
+    np.testing.assert_allclose(kontribusi_potong, kontribusi)
+
+
+def test_model_non_pohon_memakai_substitusi_rata_rata():
+    model, encoder = latih(LogisticRegression())
+    df = data_siswa(50, seed=5)
+    risiko, kontribusi = ModelExplainer(model, encoder).explain(df)
+    X = encoder.transform(df)
+    np.testing.assert_allclose(risiko, model.predict_proba(X)[:, 1] * 100)
+    j = list(FAKTOR_MODEL).index('Jumlah_Absensi')
+    X_rata = X.copy()
+    X_rata[:, 1] = X[:, 1].mean()
+    np.testing.assert_allclose(kontribusi[:, j], risiko - model.predict_proba(X_rata)[:, 1] * 100)
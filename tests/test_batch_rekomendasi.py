@@ -0,0 +1,98 @@
+import pytest
+
+import scoring
+from ai_service import AIService, StubBackend
+from batch_rekomendasi import run_batch
+from database import ConnectionPool
+
+# (nama, NISN, risiko); dua siswa terakhir di bawah ambang sehingga tidak masuk kohort
+SISWA = [("Ani", '001', 95.0), ("Budi", '002', 88.0), ("Citra", '003', 80.0), ("Dedi", '004', 72.0), ("Eka", '005', 40.0), ("Fajar", '006', 10.0)]
+KOHORT = {'001', '002', '003', '004'}
+
+
+class BackendGagalUntuk(StubBackend):
+    """StubBackend yang selalu gagal untuk prompt siswa bernama `nama`."""
+
+    def __init__(self, nama, **kwargs):
+        super().__init__(**kwargs)
+        self.nama = nama
+
+    def stream(self, prompt, timeout):
+        if f"Nama: {self.nama} " in prompt:
+            self.calls += 1
+            raise ConnectionError("koneksi terputus")
+        yield from super().stream(prompt, timeout)
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path, size=2)
+    with pool.connection() as conn:
+        conn.executemany("""INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas, Nilai_Rata_Rata_Semester, Jumlah_Absensi, Status_Beasiswa, Pekerjaan_Orang_Tua, Riwayat_Pelanggaran)
+                            VALUES (?, ?, 'XI MIPA 1', 65.0, 14, 'Tidak', 'Buruh', 40)""", [(nama, nisn) for nama, nisn, _ in SISWA])
+        kontribusi = ', '.join(scoring.KOLOM_KONTRIBUSI.values())
+        conn.executemany(f"""INSERT INTO risk_score (NISN, risk_score, row_version, model_fingerprint, scored_at, {kontribusi})
+                             VALUES (?, ?, 0, 'uji', '2026-01-01', {', '.join(['6.0'] * len(scoring.KOLOM_KONTRIBUSI))})""",
+                         [(nisn, skor) for _, nisn, skor in SISWA])
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def jalankan(backend, pool, fingerprint='model-a'):
+    ai = AIService(backend, pool, timeout=5.0, backoff=0.0)
+    progres = []
+    stats = run_batch(ai, pool, fingerprint, max_workers=2, per_menit=60000, timeout=5.0, on_progress=progres.append)
+    return stats, progres
+
+
+def tersimpan(pool):
+    with pool.connection() as conn:
+        return dict(conn.execute("SELECT NISN, model_fingerprint FROM ai_rekomendasi").fetchall())
+
+
+def test_seluruh_kohort_dibuat_lalu_dilewati_saat_tidak_berubah(pool):
+    backend = StubBackend("rekomendasi")
+    stats, progres = jalankan(backend, pool)
+    assert (stats['total'], stats['dilewati'], stats['selesai'], stats['gagal']) == (4, 0, 4, 0)
+    assert [p['selesai'] for p in progres] == [1, 2, 3, 4]
+    assert set(tersimpan(pool)) == KOHORT
+    assert backend.calls == 4
+
+    stats, progres = jalankan(backend, pool)
+    assert (stats['total'], stats['dilewati'], stats['selesai'], stats['gagal']) == (4, 4, 0, 0)
+    assert progres == []
+    assert backend.calls == 4
+
+
+def test_hanya_siswa_yang_inputnya_berubah_dibuat_ulang(pool):
+    backend = StubBackend("rekomendasi")
+    jalankan(backend, pool)
+    with pool.connection() as conn:
+        conn.execute("UPDATE data_siswa SET Jumlah_Absensi = 20 WHERE NISN = '002'")
+        conn.commit()
+    stats, _ = jalankan(backend, pool)
+    assert (stats['dilewati'], stats['selesai'], stats['gagal']) == (3, 1, 0)
+    assert backend.calls == 5
+
+
+def test_model_baru_membuat_ulang_semua_tanpa_memanggil_api_untuk_prompt_yang_sama(pool):
+    backend = StubBackend("rekomendasi")
+    jalankan(backend, pool, 'model-a')
+    stats, _ = jalankan(backend, pool, 'model-b')
+    assert (stats['dilewati'], stats['selesai'], stats['gagal']) == (0, 4, 0)
+    assert set(tersimpan(pool).values()) == {'model-b'}
+    # Prompt tidak berubah, jadi rekomendasi diambil dari ai_cache
+    assert backend.calls == 4
+
+
+def test_siswa_yang_gagal_dihitung_dan_dicoba_lagi_pada_batch_berikutnya(pool):
+    backend = BackendGagalUntuk("Citra", response="rekomendasi")
+    stats, progres = jalankan(backend, pool)
+    assert (stats['total'], stats['dilewati'], stats['selesai'], stats['gagal']) == (4, 0, 3, 1)
+    assert progres[-1]['selesai'] + progres[-1]['gagal'] == 4
+    assert set(tersimpan(pool)) == KOHORT - {'003'}
+
+    stats, _ = jalankan(StubBackend("rekomendasi"), pool)
+    assert (stats['dilewati'], stats['selesai'], stats['gagal']) == (3, 1, 0)
+    assert set(tersimpan(pool)) == KOHORT
@@ -0,0 +1,63 @@
+import pytest
+
+import daftar_siswa
+
+# (NISN, nama, kelas, skor): banyak skor kembar agar batas halaman jatuh di tengah kelompok skor yang sama
+SISWA = [('007', "Ani", "X MIPA 1", 90.0), ('003', "Budi", "X MIPA 1", 90.0), ('010', "Citra", "X IPS 1", 90.0),
+         ('001', "Dewi", "X IPS 1", 75.0), ('005', "Eka", "X MIPA 1", 75.0), ('002', "Fajar_1", "X IPS 1", 60.0),
+         ('009', "Gita", "X MIPA 1", 60.0), ('004', "Hadi", "X IPS 1", 60.0), ('008', "Indah 100%", "X MIPA 1", 20.0),
+         ('006', "Joko", "X IPS 1", 20.0)]
+URUTAN_PENUH = ['003', '007', '010', '001', '005', '002', '004', '009', '006', '008']
+
+
+@pytest.fixture
+def conn_skor(conn):
+    conn.executemany("INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas) VALUES (?, ?, ?)", [(nama, nisn, kelas) for nisn, nama, kelas, _ in SISWA])
+    conn.executemany("INSERT INTO risk_score (NISN, risk_score, row_version, model_fingerprint, scored_at) VALUES (?, ?, 0, 'uji', '2026-01-01')",
+                     [(nisn, skor) for nisn, _, _, skor in SISWA])
+    conn.commit()
+    return conn
+
+
+def semua_halaman(conn, ukuran, **filter):
+    hasil, kursor = [], None
+    # Dibatasi agar kursor yang tidak maju membuat tes gagal, bukan berputar selamanya
+    for _ in range(len(SISWA) + 1):
+        df, kursor = daftar_siswa.page_scores(conn, setelah=kursor, ukuran=ukuran, **filter)
+        hasil.append(df['NISN'].tolist())
+        if kursor is None:
+            return hasil
+    pytest.fail("paginasi tidak berhenti")
+
+
+@pytest.mark.parametrize('ukuran', [1, 2, 3, 4, 10])
+def test_halaman_mengikuti_skor_lalu_nisn_tanpa_lompat_atau_ganda(conn_skor, ukuran):
+    halaman = semua_halaman(conn_skor, ukuran)
+    assert sum(halaman, []) == URUTAN_PENUH
+    assert all(len(h) == ukuran for h in halaman[:-1])
+
+
+def test_kursor_adalah_baris_terakhir_halaman(conn_skor):
+    df, kursor = daftar_siswa.page_scores(conn_skor, ukuran=2)
+    assert kursor == (90.0, '007')
+    df, kursor = daftar_siswa.page_scores(conn_skor, setelah=kursor, ukuran=2)
+    assert df['NISN'].tolist() == ['010', '001']
+    assert kursor == (75.0, '001')
+
+
+def test_halaman_terakhir_pas_tidak_memberi_kursor(conn_skor):
+    df, kursor = daftar_siswa.page_scores(conn_skor, ukuran=len(SISWA))
+    assert len(df) == len(SISWA) and kursor is None
+
+
+def test_paginasi_dengan_filter_band(conn_skor):
+    halaman = semua_halaman(conn_skor, 2, band='Perhatian Khusus')
+    assert sum(halaman, []) == ['002', '004', '009']
+    assert daftar_siswa.count_scores(conn_skor, band='Perhatian Khusus') == 3
+
+
+@pytest.mark.parametrize('cari, nisn', [("mipa", ['003', '007', '005', '009', '008']), ("00", [n for n in URUTAN_PENUH if n != '010']), ("01", ['010']),
+                                        ("Fajar_", ['002']), ("_", ['002']), ("100%", ['008']), ("%", ['008'])])
+def test_pencarian_dengan_karakter_wildcard(conn_skor, cari, nisn):
+    assert sum(semua_halaman(conn_skor, 3, cari=cari), []) == nisn
+    assert daftar_siswa.count_scores(conn_skor, cari=cari) == len(nisn)
@@ -0,0 +1,132 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import MIGRASI, diff_data, get_connection, init_db, read_data, update_data
+from skema import KOLOM_DATA_SISWA
+
+
+def siswa(nisn, nama="Siswa", kelas="X MIPA 1", nilai=80.0, absensi=2, beasiswa="Tidak", pekerjaan="PNS", pelanggaran=0):
+    return {'Nama_Siswa': nama, 'NISN': nisn, 'Kelas': kelas, 'Nilai_Rata_Rata_Semester': nilai, 'Jumlah_Absensi': absensi,
+            'Status_Beasiswa': beasiswa, 'Pekerjaan_Orang_Tua': pekerjaan, 'Riwayat_Pelanggaran': pelanggaran}
+
+
+@pytest.fixture
+def df_awal():
+    return pd.DataFrame([siswa('001', "Ani"), siswa('002', "Budi"), siswa('003', "Citra", pekerjaan=None)], columns=KOLOM_DATA_SISWA)
+
+
+def test_tanpa_perubahan(df_awal):
+    baru, berubah, dihapus = diff_data(df_awal, df_awal.copy())
+    assert baru.empty and berubah.empty and dihapus == []
+
+
+def test_baris_baru_berubah_dan_dihapus(df_awal):
+    df_edit = df_awal.copy()
+    df_edit.loc[1, 'Jumlah_Absensi'] = 9
+    df_edit = pd.concat([df_edit.drop(index=0), pd.DataFrame([siswa('004', "Dewi")])], ignore_index=True)
+    baru, berubah, dihapus = diff_data(df_awal, df_edit)
+    assert baru['NISN'].tolist() == ['004']
+    assert berubah['NISN'].tolist() == ['002']
+    assert berubah['Jumlah_Absensi'].tolist() == [9]
+    assert dihapus == ['001']
+    assert list(baru.columns) == KOLOM_DATA_SISWA and list(berubah.columns) == KOLOM_DATA_SISWA
+
+
+def test_nilai_kosong_di_kedua_sisi_tidak_dianggap_berubah(df_awal):
+    _, berubah, _ = diff_data(df_awal, df_awal.copy())
+    assert '003' not in berubah['NISN'].tolist()
+
+
+def test_nisn_dirapikan_sebelum_dibandingkan(df_awal):
+    df_edit = df_awal.copy()
+    df_edit['NISN'] = [' 001', '002 ', '003']
+    baru, berubah, dihapus = diff_data(df_awal, df_edit)
+    assert baru.empty and berubah.empty and dihapus == []
+
+
+def test_urutan_baris_tidak_berpengaruh(df_awal):
+    baru, berubah, dihapus = diff_data(df_awal, df_awal.iloc[::-1].reset_index(drop=True))
+    assert baru.empty and berubah.empty and dihapus == []
+
+
+@pytest.mark.parametrize('nisn, pesan', [([None, '002', '003'], "kosong"), (['', '002', '003'], "kosong"), (['001', '001', '003'], "ganda")])
+def test_nisn_tidak_valid_ditolak(df_awal, nisn, pesan):
+    df_edit = df_awal.copy()
+    df_edit['NISN'] = nisn
+    with pytest.raises(ValueError, match=pesan):
+        diff_data(df_awal, df_edit)
+
+
+def test_update_data_hanya_menulis_perubahan(conn, df_awal):
+    update_data(conn, df_awal.iloc[:0], df_awal)
+    df_tersimpan = read_data(conn)
+    df_edit = df_tersimpan.copy()
+    df_edit.loc[df_edit['NISN'] == '002', 'Nama_Siswa'] = "Budi Santoso"
+    assert update_data(conn, df_tersimpan, df_edit) == 1
+    assert read_data(conn).set_index('NISN').loc['002', 'Nama_Siswa'] == "Budi Santoso"
+
+
+def test_baris_baru_dengan_nisn_siswa_di_halaman_lain_ditolak(conn, df_awal):
+    update_data(conn, df_awal.iloc[:0], df_awal)
+    # Halaman editor hanya berisi siswa 001; siswa 002 ada di halaman lain
+    halaman = read_data(conn).iloc[:1]
+    df_edit = pd.concat([halaman, pd.DataFrame([siswa('002', "Penyusup", kelas="XII IPS 9", nilai=10.0)])], ignore_index=True)
+    with pytest.raises(ValueError, match="002"):
+        update_data(conn, halaman, df_edit)
+    tersimpan = read_data(conn).set_index('NISN').loc['002']
+    assert (tersimpan['Nama_Siswa'], tersimpan['Kelas'], tersimpan['Nilai_Rata_Rata_Semester']) == ("Budi", "X MIPA 1", 80.0)
+
+
+def test_penolakan_membatalkan_seluruh_perubahan_halaman(conn, df_awal):
+    update_data(conn, df_awal.iloc[:0], df_awal)
+    halaman = read_data(conn).iloc[:1]
+    df_edit = halaman.copy()
+    df_edit.loc[0, 'Nama_Siswa'] = "Ani Baru"
+    df_edit = pd.concat([df_edit, pd.DataFrame([siswa('003', "Ganda")])], ignore_index=True)
+    with pytest.raises(ValueError):
+        update_data(conn, halaman, df_edit)
+    assert read_data(conn).set_index('NISN').loc['001', 'Nama_Siswa'] == "Ani"
+
+
+def test_migrasi_tabel_to_sql_lama(tmp_path):
+    path = str(tmp_path / 'lama.db')
+    raw = sqlite3.connect(path)
+    # Tabel hasil to_sql(if_exists='replace'): NISN INTEGER tanpa PRIMARY KEY, dengan NISN ganda
+    pd.DataFrame([siswa(1001, "Ani"), siswa(1002, "Budi Lama"), siswa(1002, "Budi Baru"), siswa(1003, "Citra")]).to_sql('data_siswa', raw, index=False)
+    raw.execute("CREATE TABLE log_intervensi (id INTEGER PRIMARY KEY AUTOINCREMENT, nisn TEXT NOT NULL, tanggal TEXT NOT NULL, tindakan TEXT NOT NULL, catatan TEXT, dicatat_oleh TEXT)")
+    # NISN numpy.int64 yang tersimpan sebagai BLOB 8 byte, di samping NISN teks biasa
+    raw.executemany("INSERT INTO log_intervensi (nisn, tanggal, tindakan) VALUES (?, '2024-01-01', 'Konseling Individual')",
+                    [(np.int64(1001).tobytes(),), (np.int64(1002).tobytes(),), ('1003',)])
+    raw.commit()
+    raw.close()
+
+    init_db(path)
+    conn = get_connection(path)
+    kolom = {row[1]: row for row in conn.execute("PRAGMA table_info(data_siswa)")}
+    assert kolom['NISN'][2] == 'TEXT' and kolom['NISN'][5] == 1
+    assert dict(conn.execute("SELECT NISN, Nama_Siswa FROM data_siswa")) == {'1001': "Ani", '1002': "Budi Baru", '1003': "Citra"}
+    assert conn.execute("SELECT typeof(NISN) FROM data_siswa GROUP BY 1").fetchall() == [('text',)]
+    assert conn.execute("SELECT Nama_Siswa FROM data_siswa_tersisih").fetchall() == [("Budi Lama",)]
+    assert conn.execute("SELECT nisn, typeof(nisn) FROM log_intervensi ORDER BY id").fetchall() == [('1001', 'text'), ('1002', 'text'), ('1003', 'text')]
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRASI)
+    conn.close()
+
+    # Migrasi tidak dijalankan ulang pada database yang sudah mutakhir
+    init_db(path)
+    conn = get_connection(path)
+    assert conn.execute("SELECT COUNT(*) FROM data_siswa").fetchone()[0] == 3
+    assert conn.execute("SELECT COUNT(*) FROM data_siswa_tersisih").fetchone()[0] == 1
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRASI)
+    conn.close()
+
+
+def test_database_baru_tanpa_tabel_tersisih(db_path):
+    conn = get_connection(db_path)
+    tabel = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'data_siswa', 'log_intervensi', 'risk_score', 'risk_history', 'ai_cache', 'ai_rekomendasi', 'app_meta'} <= tabel
+    assert 'data_siswa_tersisih' not in tabel
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRASI)
+    conn.close()
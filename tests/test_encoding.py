@@ -0,0 +1,84 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+import scoring
+from encoding import FeatureEncoder
+from model_artifact import AffineScaler
+from skema import PILIHAN_PEKERJAAN
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH, SCALER_PATH, COLUMNS_PATH = (os.path.join(ROOT, p) for p in scoring.FILE_MODEL)
+
+
+def encode_lama(df, model_columns, scaler):
+    """Jalur pandas sebelum FeatureEncoder: map + get_dummies + kolom yang hilang diisi 0 + scaler.transform."""
+    df_features = df.drop(columns=[c for c in scoring.KOLOM_IDENTITAS if c in df.columns])
+    df_features['Status_Beasiswa'] = df_features['Status_Beasiswa'].map({'Ya': 1, 'Tidak': 0})
+    df_features = pd.get_dummies(df_features, columns=['Pekerjaan_Orang_Tua'])
+    for col in model_columns:
+        if col not in df_features.columns:
+            df_features[col] = 0
+    X = df_features[model_columns].astype(float)
+    return scaler.transform(X if hasattr(scaler, 'feature_names_in_') else X.to_numpy())
+
+
+def data_siswa(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    # 'Dokter' tidak dikenal model; 'Buruh' adalah kategori yang di-drop saat pelatihan
+    return pd.DataFrame({'Nama_Siswa': "Siswa", 'NISN': [str(i) for i in range(n)], 'Kelas': "X MIPA 1",
+                         'Nilai_Rata_Rata_Semester': rng.uniform(0, 100, n).round(1), 'Jumlah_Absensi': rng.integers(0, 31, n),
+                         'Status_Beasiswa': rng.choice(['Ya', 'Tidak'], n), 'Pekerjaan_Orang_Tua': rng.choice([*PILIHAN_PEKERJAAN, 'Dokter'], n),
+                         'Riwayat_Pelanggaran': rng.integers(0, 101, n)})
+
+
+@pytest.fixture(scope='module')
+def model_asli():
+    if not all(os.path.exists(p) for p in (MODEL_PATH, SCALER_PATH, COLUMNS_PATH)):
+        pytest.skip("file model .pkl tidak tersedia")
+    return joblib.load(MODEL_PATH), joblib.load(SCALER_PATH), [str(c) for c in joblib.load(COLUMNS_PATH)]
+
+
+def scaler_standar(model_columns):
+    rng = np.random.default_rng(1)
+    return StandardScaler().fit(rng.normal(50, 20, (100, len(model_columns))))
+
+
+@pytest.mark.parametrize('jenis_scaler', ['pkl', 'artefak', 'standar'])
+def test_transform_sama_dengan_jalur_pandas(model_asli, jenis_scaler):
+    _, scaler, model_columns = model_asli
+    if jenis_scaler == 'standar':
+        scaler = scaler_standar(model_columns)
+    encoder_scaler = AffineScaler.from_sklearn(scaler) if jenis_scaler == 'artefak' else scaler
+    df = data_siswa()
+    assert {'Buruh', 'Dokter'} <= set(df['Pekerjaan_Orang_Tua'])
+    assert 'Pekerjaan_Orang_Tua_Buruh' not in model_columns
+    np.testing.assert_allclose(FeatureEncoder(model_columns, encoder_scaler).transform(df), encode_lama(df, model_columns, scaler), rtol=0, atol=1e-12)
+
+
+def test_encode_one_sama_dengan_jalur_pandas(model_asli):
+    _, scaler, model_columns = model_asli
+    encoder = FeatureEncoder(model_columns, scaler)
+    df = data_siswa(40, seed=2)
+    for i in range(len(df)):
+        siswa = df.iloc[i]
+        np.testing.assert_allclose(encoder.encode_one(siswa), encode_lama(df.iloc[[i]], model_columns, scaler), rtol=0, atol=1e-12)
+        np.testing.assert_allclose(encoder.encode_one(siswa.to_dict()), encoder.encode_one(siswa))
+
+
+@pytest.mark.parametrize('pekerjaan', ['PNS', 'Buruh', 'Dokter'])
+def test_sweep_sama_dengan_prediksi_per_baris(model_asli, pekerjaan):
+    model, scaler, model_columns = model_asli
+    encoder = FeatureEncoder(model_columns, scaler)
+    siswa = {'Nilai_Rata_Rata_Semester': 75.5, 'Jumlah_Absensi': 5, 'Status_Beasiswa': 'Tidak', 'Pekerjaan_Orang_Tua': pekerjaan, 'Riwayat_Pelanggaran': 10}
+    nilai_absensi, nilai_rapor = list(range(0, 31, 3)), [50.0, 75.5, 90.0]
+    df_sweep = encoder.sweep(model, siswa, 'Jumlah_Absensi', nilai_absensi, 'Nilai_Rata_Rata_Semester', nilai_rapor)
+    assert df_sweep.shape == (len(nilai_rapor), len(nilai_absensi))
+    grid = pd.DataFrame([{**siswa, 'Jumlah_Absensi': a, 'Nilai_Rata_Rata_Semester': r} for r in nilai_rapor for a in nilai_absensi])
+    acuan = model.predict_proba(encode_lama(grid, model_columns, scaler))[:, 1].reshape(len(nilai_rapor), len(nilai_absensi)) * 100
+    np.testing.assert_allclose(df_sweep.to_numpy(), acuan, rtol=0, atol=1e-9)
+    assert df_sweep.loc[75.5, 6] == pytest.approx(model.predict_proba(encoder.encode_one({**siswa, 'Jumlah_Absensi': 6}))[0, 1] * 100)
@@ -0,0 +1,104 @@
+import csv
+import os
+
+import pytest
+
+import export
+import scoring
+
+
+@pytest.fixture
+def conn_laporan(conn):
+    siswa = [('001', "XI MIPA-3", 90.0), ('002', "XI MIPA 3", 80.0), ('003', "XI MIPA-3", 55.0), ('004', "X IPS 1", 30.0), ('005', "X IPS 1", 10.0)]
+    conn.executemany("INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas) VALUES (?, ?, ?)", [(f"Siswa {nisn}", nisn, kelas) for nisn, kelas, _ in siswa])
+    conn.executemany("INSERT INTO risk_score (NISN, risk_score, row_version, model_fingerprint, scored_at) VALUES (?, ?, 0, 'uji', '2026-01-01')",
+                     [(nisn, skor) for nisn, _, skor in siswa])
+    conn.commit()
+    return conn
+
+
+def nisn_laporan(conn, lingkup, chunksize=2):
+    return [row[1] for rows in export.iter_report_rows(conn, lingkup, chunksize) for row in rows]
+
+
+def baca_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+
+@pytest.mark.parametrize('lingkup, nisn', [(('semua', None), ['001', '002', '003', '004', '005']),
+                                           (('kelas', "XI MIPA-3"), ['001', '003']),
+                                           (('kelas', "XI MIPA 3"), ['002']),
+                                           (('band', 'Prioritas Utama'), ['001', '002']),
+                                           (('band', 'Perhatian Khusus'), ['003']),
+                                           (('band', 'Aman'), ['005'])])
+def test_lingkup_laporan(conn_laporan, lingkup, nisn):
+    assert nisn_laporan(conn_laporan, lingkup) == nisn
+
+
+def test_batas_band_mengikuti_band_risiko(conn_laporan):
+    conn_laporan.execute("UPDATE risk_score SET risk_score = ? WHERE NISN = '004'", (scoring.BAND_RISIKO['Perhatian Khusus'][0],))
+    assert '004' in nisn_laporan(conn_laporan, ('band', 'Perhatian Khusus'))
+    assert '004' not in nisn_laporan(conn_laporan, ('band', 'Waspada'))
+
+
+@pytest.mark.parametrize('fmt', list(export.FORMAT))
+def test_semua_format_ditulis(conn_laporan, tmp_path, fmt):
+    path = export.export_report(conn_laporan, fmt, ('semua', None), 1, 'abc', cache_dir=str(tmp_path / 'laporan'))
+    assert os.path.getsize(path) > 0
+
+
+def test_isi_csv(conn_laporan, tmp_path):
+    path = export.export_report(conn_laporan, 'csv', ('kelas', "X IPS 1"), 1, 'abc', cache_dir=str(tmp_path / 'laporan'))
+    assert baca_csv(path) == [export.KOLOM_LAPORAN, ["Siswa 004", '004', "X IPS 1", '30.0'], ["Siswa 005", '005', "X IPS 1", '10.0']]
+
+
+def test_cache_dipakai_selama_versi_data_dan_model_sama(conn_laporan, tmp_path):
+    cache_dir = str(tmp_path / 'laporan')
+    lingkup = ('semua', None)
+    assert export.cached_report('csv', lingkup, 1, 'abc', cache_dir) is None
+    path = export.export_report(conn_laporan, 'csv', lingkup, 1, 'abc', cache_dir=cache_dir)
+    assert export.cached_report('csv', lingkup, 1, 'abc', cache_dir) == path
+    # Perubahan yang tidak menaikkan versi tidak terlihat: file lama yang disajikan
+    conn_laporan.execute("DELETE FROM risk_score WHERE NISN = '005'")
+    assert export.export_report(conn_laporan, 'csv', lingkup, 1, 'abc', cache_dir=cache_dir) == path
+    assert len(baca_csv(path)) == 6
+    assert export.cached_report('csv', lingkup, 2, 'abc', cache_dir) is None
+    assert export.cached_report('csv', lingkup, 1, 'def', cache_dir) is None
+    assert export.cached_report('xlsx', lingkup, 1, 'abc', cache_dir) is None
+
+
+@pytest.mark.parametrize('data_version, fingerprint', [(2, 'abc'), (1, 'def')])
+def test_file_lama_dipangkas_setelah_versi_baru_ditulis(conn_laporan, tmp_path, data_version, fingerprint):
+    cache_dir = str(tmp_path / 'laporan')
+    lama = export.export_report(conn_laporan, 'csv', ('semua', None), 1, 'abc', cache_dir=cache_dir)
+    format_lain = export.export_report(conn_laporan, 'xlsx', ('semua', None), 1, 'abc', cache_dir=cache_dir)
+    lingkup_lain = export.export_report(conn_laporan, 'csv', ('band', 'Aman'), 1, 'abc', cache_dir=cache_dir)
+    baru = export.export_report(conn_laporan, 'csv', ('semua', None), data_version, fingerprint, cache_dir=cache_dir)
+    assert baru != lama and not os.path.exists(lama)
+    assert os.path.exists(format_lain) and os.path.exists(lingkup_lain)
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(p) for p in (baru, format_lain, lingkup_lain))
+
+
+def test_kelas_dengan_slug_sama_tidak_berbagi_file(conn_laporan, tmp_path):
+    cache_dir = str(tmp_path / 'laporan')
+    strip, spasi = ('kelas', "XI MIPA-3"), ('kelas', "XI MIPA 3")
+    assert export.scope_slug(strip) == export.scope_slug(spasi)
+    path_strip = export.export_report(conn_laporan, 'csv', strip, 1, 'abc', cache_dir=cache_dir)
+    assert export.cached_report('csv', spasi, 1, 'abc', cache_dir) is None
+    path_spasi = export.export_report(conn_laporan, 'csv', spasi, 1, 'abc', cache_dir=cache_dir)
+    assert path_spasi != path_strip and os.path.exists(path_strip)
+    assert [row[1] for row in baca_csv(path_strip)[1:]] == ['001', '003']
+    assert [row[1] for row in baca_csv(path_spasi)[1:]] == ['002']
+    # Versi baru untuk satu kelas tidak memangkas file kelas lain yang slug-nya sama
+    export.export_report(conn_laporan, 'csv', spasi, 2, 'abc', cache_dir=cache_dir)
+    assert os.path.exists(path_strip)
+
+
+def test_laporan_yang_hilang_sebelum_dibaca_tidak_dianggap_ada(conn_laporan, tmp_path):
+    cache_dir = str(tmp_path / 'laporan')
+    path = export.export_report(conn_laporan, 'csv', ('semua', None), 1, 'abc', cache_dir=cache_dir)
+    assert export.read_report(export.cached_report('csv', ('semua', None), 1, 'abc', cache_dir)) == open(path, 'rb').read()
+    os.remove(path)  # dipangkas sesi lain di antara cached_report dan pembacaan
+    assert export.read_report(path) is None
+    assert export.read_report(None) is None
@@ -0,0 +1,87 @@
+import pandas as pd
+import pytest
+
+import import_siswa
+from database import add_data
+from skema import KOLOM_DATA_SISWA
+
+
+def baris(nisn, **ubah):
+    data = {'Nama_Siswa': "Siswa", 'NISN': nisn, 'Kelas': "X MIPA 1", 'Nilai_Rata_Rata_Semester': 80, 'Jumlah_Absensi': 2,
+            'Status_Beasiswa': "Tidak", 'Pekerjaan_Orang_Tua': "PNS", 'Riwayat_Pelanggaran': 0}
+    return {**data, **ubah}
+
+
+@pytest.fixture
+def conn_impor(conn):
+    import_siswa._init_import_table(conn)
+    return conn
+
+
+def validasi(conn, rows, update_existing=False):
+    return import_siswa.validate_chunk(conn, pd.DataFrame(rows), 2, update_existing)
+
+
+def alasan(df_ditolak):
+    return dict(zip(df_ditolak['NISN'], df_ditolak['Alasan']))
+
+
+def test_baris_valid_dirapikan_dan_dikonversi(conn_impor):
+    df_valid, df_ditolak = validasi(conn_impor, [baris(' 001 ', Nama_Siswa=" Ani ", Jumlah_Absensi="3"), baris(2.0, Nilai_Rata_Rata_Semester="75.5")])
+    assert df_ditolak.empty
+    assert df_valid['NISN'].tolist() == ['001', '2']
+    assert df_valid['Nama_Siswa'].tolist()[0] == "Ani"
+    assert df_valid['Jumlah_Absensi'].tolist() == [3, 2]
+    assert df_valid['Nilai_Rata_Rata_Semester'].tolist() == [80.0, 75.5]
+    assert list(df_valid.columns) == KOLOM_DATA_SISWA
+
+
+@pytest.mark.parametrize('ubah, pesan', [
+    ({'Nama_Siswa': ""}, "Nama_Siswa kosong"),
+    ({'Kelas': None}, "Kelas kosong"),
+    ({'Nilai_Rata_Rata_Semester': 101}, "Nilai_Rata_Rata_Semester harus 0-100"),
+    ({'Nilai_Rata_Rata_Semester': "tujuh puluh"}, "Nilai_Rata_Rata_Semester harus 0-100"),
+    ({'Jumlah_Absensi': 2.5}, "Jumlah_Absensi harus bilangan bulat >= 0"),
+    ({'Riwayat_Pelanggaran': -1}, "Riwayat_Pelanggaran harus bilangan bulat >= 0"),
+    ({'Status_Beasiswa': "ya"}, "Status_Beasiswa harus salah satu dari"),
+    ({'Pekerjaan_Orang_Tua': "Dokter"}, "Pekerjaan_Orang_Tua harus salah satu dari"),
+])
+def test_baris_tidak_valid_ditolak_dengan_alasan(conn_impor, ubah, pesan):
+    df_valid, df_ditolak = validasi(conn_impor, [baris('001'), baris('002', **ubah)])
+    assert df_valid['NISN'].tolist() == ['001']
+    assert alasan(df_ditolak)['002'].startswith(pesan)
+
+
+def test_nomor_baris_mengikuti_posisi_di_file(conn_impor):
+    df = pd.DataFrame([baris('001'), baris('002', Kelas=""), baris('003'), baris('004', Kelas="")])
+    _, df_ditolak = import_siswa.validate_chunk(conn_impor, df, 102)
+    assert df_ditolak['Baris'].tolist() == [103, 105]
+    assert list(df_ditolak.columns) == import_siswa.KOLOM_DITOLAK
+
+
+def test_nisn_kosong_ditolak(conn_impor):
+    _, df_ditolak = validasi(conn_impor, [baris(None), baris('  ')])
+    assert df_ditolak['Alasan'].tolist() == ["NISN kosong", "NISN kosong"]
+
+
+def test_nisn_ganda_dalam_chunk_dan_antar_chunk(conn_impor):
+    df_valid, df_ditolak = validasi(conn_impor, [baris('001'), baris('001', Nama_Siswa="Kembar")])
+    assert df_valid['Nama_Siswa'].tolist() == ["Siswa"]
+    assert df_ditolak['Alasan'].tolist() == ["NISN ganda dalam file"]
+    import_siswa.write_chunk(conn_impor, df_valid)
+    df_valid, df_ditolak = validasi(conn_impor, [baris('001')], update_existing=True)
+    assert df_valid.empty
+    assert df_ditolak['Alasan'].tolist() == ["NISN ganda dalam file"]
+
+
+def test_nisn_terdaftar_ditolak_kecuali_mode_update(conn_impor):
+    add_data(conn_impor, baris('001'))
+    _, df_ditolak = validasi(conn_impor, [baris('001')])
+    assert df_ditolak['Alasan'].tolist() == ["NISN sudah terdaftar"]
+    df_valid, df_ditolak = validasi(conn_impor, [baris('001', Jumlah_Absensi=5)], update_existing=True)
+    assert df_ditolak.empty and df_valid['Jumlah_Absensi'].tolist() == [5]
+
+
+def test_kolom_wajib_hilang(conn_impor):
+    with pytest.raises(ValueError, match="Riwayat_Pelanggaran"):
+        validasi(conn_impor, [{k: v for k, v in baris('001').items() if k != 'Riwayat_Pelanggaran'}])
@@ -0,0 +1,103 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.tree import DecisionTreeClassifier
+
+import model_artifact
+from model_artifact import AffineScaler, load_models, pack, validate_columns
+
+MODEL_COLUMNS = ['Nilai_Rata_Rata_Semester', 'Jumlah_Absensi', 'Status_Beasiswa', 'Riwayat_Pelanggaran',
+                 'Pekerjaan_Orang_Tua_Lainnya', 'Pekerjaan_Orang_Tua_PNS', 'Pekerjaan_Orang_Tua_Petani', 'Pekerjaan_Orang_Tua_Wiraswasta']
+
+
+def tulis_sumber(folder, max_depth=3, model_columns=MODEL_COLUMNS):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 100, (200, len(model_columns)))
+    scaler = MinMaxScaler().fit(X)
+    model = DecisionTreeClassifier(max_depth=max_depth, random_state=0).fit(scaler.transform(X), X[:, 1] > 50)
+    sumber = tuple(str(folder / nama) for nama in ('model_prediksi.pkl', 'scaler.pkl', 'model_columns.pkl'))
+    for obj, path in zip((model, scaler, list(model_columns)), sumber):
+        joblib.dump(obj, path)
+    return sumber, X
+
+
+@pytest.fixture
+def sumber(tmp_path):
+    return tulis_sumber(tmp_path)
+
+
+def test_validate_columns_menerima_kolom_encoding_tanpa_satu_kategori():
+    validate_columns(MODEL_COLUMNS)
+    validate_columns(MODEL_COLUMNS + ['Pekerjaan_Orang_Tua_Buruh'])
+
+
+@pytest.mark.parametrize('kolom, pesan', [(MODEL_COLUMNS + ['Jarak_Rumah'], "Jarak_Rumah"), (MODEL_COLUMNS[1:], "Nilai_Rata_Rata_Semester"),
+                                          (MODEL_COLUMNS[:4] + ['Pekerjaan_Orang_Tua_Dokter'], "Pekerjaan_Orang_Tua_Dokter")])
+def test_validate_columns_menolak_skema_lain(kolom, pesan):
+    with pytest.raises(ValueError, match=pesan):
+        validate_columns(kolom)
+
+
+def test_artefak_memuat_model_yang_sama_dengan_file_sumber(tmp_path, sumber):
+    path_sumber, X = sumber
+    artefak = str(tmp_path / 'model.joblib')
+    pack(artefak, path_sumber)
+    model, scaler, kolom, info = load_models(artefak, path_sumber)
+    model_pkl, scaler_pkl, kolom_pkl, info_pkl = load_models(str(tmp_path / 'tidak_ada.joblib'), path_sumber)
+    assert info['format'] == f"artefak v{model_artifact.VERSI_FORMAT}" and info_pkl['format'] == "pickle terpisah"
+    assert info['fingerprint'] == info_pkl['fingerprint']
+    assert isinstance(scaler, AffineScaler) and kolom == MODEL_COLUMNS == list(kolom_pkl)
+    np.testing.assert_allclose(scaler.transform(X), scaler_pkl.transform(X))
+    np.testing.assert_array_equal(model.predict_proba(scaler.transform(X)), model_pkl.predict_proba(scaler_pkl.transform(X)))
+
+
+def test_pack_ulang_tidak_mengubah_fingerprint(tmp_path, sumber):
+    path_sumber, _ = sumber
+    artefak = str(tmp_path / 'model.joblib')
+    pack(artefak, path_sumber)
+    sebelum = load_models(artefak, path_sumber)[3]['fingerprint']
+    pack(artefak, path_sumber)
+    assert load_models(artefak, path_sumber)[3]['fingerprint'] == sebelum
+
+
+def test_artefak_usang_diabaikan_setelah_file_sumber_diganti(tmp_path, sumber):
+    path_sumber, _ = sumber
+    artefak = str(tmp_path / 'model.joblib')
+    pack(artefak, path_sumber)
+    fingerprint_lama = load_models(artefak, path_sumber)[3]['fingerprint']
+    tulis_sumber(tmp_path, max_depth=6)
+    model, _, _, info = load_models(artefak, path_sumber)
+    assert info['format'] == "pickle terpisah"
+    assert info['fingerprint'] != fingerprint_lama
+    assert model.max_depth == 6
+
+
+def test_versi_format_lain_diabaikan(tmp_path, sumber, monkeypatch):
+    path_sumber, _ = sumber
+    artefak = str(tmp_path / 'model.joblib')
+    pack(artefak, path_sumber)
+    monkeypatch.setattr(model_artifact, 'VERSI_FORMAT', model_artifact.VERSI_FORMAT + 1)
+    assert load_models(artefak, path_sumber)[3]['format'] == "pickle terpisah"
+
+
+def test_artefak_tanpa_file_sumber_tetap_dimuat(tmp_path, sumber):
+    path_sumber, _ = sumber
+    artefak = str(tmp_path / 'model.joblib')
+    pack(artefak, path_sumber)
+    fingerprint = load_models(artefak, path_sumber)[3]['fingerprint']
+    hilang = tuple(str(tmp_path / f'hilang_{i}.pkl') for i in range(3))
+    assert load_models(artefak, hilang)[3]['fingerprint'] == fingerprint
+
+
+def test_tanpa_file_model(tmp_path):
+    hilang = tuple(str(tmp_path / f'hilang_{i}.pkl') for i in range(3))
+    assert load_models(str(tmp_path / 'model.joblib'), hilang) == (None, None, None, None)
+
+
+def test_pack_menolak_kolom_yang_tidak_cocok(tmp_path):
+    path_sumber, _ = tulis_sumber(tmp_path, model_columns=MODEL_COLUMNS + ['Jarak_Rumah'])
+    artefak = tmp_path / 'model.joblib'
+    with pytest.raises(ValueError, match="Jarak_Rumah"):
+        pack(str(artefak), path_sumber)
+    assert not artefak.exists()
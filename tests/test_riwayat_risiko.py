@@ -0,0 +1,121 @@
+import math
+
+import pandas as pd
+import pytest
+
+import scoring
+from database import add_data, delete_data, read_data, update_data
+
+
+def catat(conn, *rows):
+    """rows: (NISN, recorded_at, Kelas, risk_score); periode diambil dari recorded_at."""
+    conn.executemany("INSERT INTO risk_history (NISN, recorded_at, periode, Kelas, features_hash, risk_score, model_version) VALUES (?, ?, ?, ?, 'h', ?, 'uji')",
+                     [(nisn, waktu, waktu[:7], kelas, skor) for nisn, waktu, kelas, skor in rows])
+    conn.commit()
+
+
+def daftarkan(conn, *siswa):
+    """siswa: (NISN, Kelas, skor sekarang)."""
+    conn.executemany("INSERT INTO data_siswa (Nama_Siswa, NISN, Kelas) VALUES ('Siswa', ?, ?)", [(nisn, kelas) for nisn, kelas, _ in siswa])
+    conn.executemany("INSERT INTO risk_score (NISN, risk_score, row_version, model_fingerprint, scored_at) VALUES (?, ?, 0, 'uji', '2020-01-01')",
+                     [(nisn, skor) for nisn, _, skor in siswa])
+    conn.commit()
+
+
+def tren(conn, kelas, sejak='0000', sampai='2020-12'):
+    df = scoring.read_class_history(conn, kelas, sejak)
+    return {p: (round(s, 6), n) for p, s, n in df[df['periode'] <= sampai].itertuples(index=False)}
+
+
+@pytest.fixture
+def conn_riwayat(conn):
+    daftarkan(conn, ('001', "X A", 60.0), ('002', "X B", 20.0))
+    catat(conn,
+          ('001', '2020-01-05 08:00:00.000000', "X A", 80.0),
+          ('002', '2020-01-06 08:00:00.000000', "X A", 20.0),
+          # 003 sudah dihapus dari data_siswa setelah Februari
+          ('003', '2020-02-10 08:00:00.000000', "X A", 50.0),
+          # Dua perubahan 001 dalam detik yang sama: baris terakhir yang berlaku
+          ('001', '2020-03-02 10:00:00.100000', "X A", 70.0),
+          ('001', '2020-03-02 10:00:00.900000', "X A", 60.0),
+          # 002 pindah ke X B pada April
+          ('002', '2020-04-01 08:00:00.000000', "X B", 20.0))
+    return conn
+
+
+def test_tren_kelas_membawa_skor_terakhir_ke_bulan_berikutnya(conn_riwayat):
+    assert tren(conn_riwayat, "X A", sampai='2020-06') == {
+        '2020-01': (50.0, 2),
+        '2020-02': (50.0, 3),
+        '2020-03': (40.0, 2),
+        '2020-04': (60.0, 1),
+        '2020-05': (60.0, 1),
+        '2020-06': (60.0, 1),
+    }
+
+
+def test_tren_kelas_sampai_bulan_ini(conn_riwayat):
+    df = scoring.read_class_history(conn_riwayat, "X A")
+    assert df['periode'].iloc[-1] == pd.Timestamp.now().strftime('%Y-%m')
+    assert df['jumlah_siswa'].iloc[-1] == 1
+
+
+def test_siswa_pindah_kelas_dihitung_di_kelas_baru(conn_riwayat):
+    assert tren(conn_riwayat, "X B", sampai='2020-05') == {'2020-04': (20.0, 1), '2020-05': (20.0, 1)}
+
+
+def test_tren_kelas_mulai_dari_sejak(conn_riwayat):
+    assert list(tren(conn_riwayat, "X A", sejak='2020-03-15', sampai='2020-04')) == ['2020-03', '2020-04']
+
+
+def test_siswa_yang_dihapus_tidak_dibawa_ke_bulan_berikutnya(conn):
+    catat(conn, ('101', '2020-08-01 08:00:00.000000', "X C", 40.0), ('102', '2020-08-02 08:00:00.000000', "X C", 60.0))
+    assert tren(conn, "X C") == {'2020-08': (50.0, 2)}
+
+
+def test_kelas_tanpa_riwayat(conn_riwayat):
+    df = scoring.read_class_history(conn_riwayat, "XII Z")
+    assert df.empty and list(df.columns) == ['periode', 'risk_score', 'jumlah_siswa']
+
+
+def test_riwayat_siswa_berurutan_termasuk_perubahan_dalam_detik_yang_sama(conn_riwayat):
+    df = scoring.read_student_history(conn_riwayat, '001')
+    assert df['risk_score'].tolist() == [80.0, 70.0, 60.0]
+    assert scoring.read_student_history(conn_riwayat, '001', sejak='2020-03')['risk_score'].tolist() == [70.0, 60.0]
+
+
+def test_risk_delta_since(conn_riwayat):
+    daftarkan(conn_riwayat, ('004', "X A", 30.0))
+    df = scoring.risk_delta_since(conn_riwayat, '2020-03-03').set_index('NISN')
+    # 003 sudah dihapus sehingga tidak muncul; 004 belum punya riwayat sebelum tanggal itu
+    assert sorted(df.index) == ['001', '002', '004']
+    assert df.loc['001', 'skor_sebelumnya'] == 60.0 and df.loc['001', 'delta'] == 0.0
+    assert df.loc['002', 'skor_sekarang'] == 20.0 and df.loc['002', 'delta'] == 0.0
+    assert math.isnan(df.loc['004', 'skor_sebelumnya']) and math.isnan(df.loc['004', 'delta'])
+    assert scoring.risk_delta_since(conn_riwayat, '2020-02-01').set_index('NISN').loc['001', 'delta'] == -20.0
+
+
+def test_dua_perubahan_berturut_turut_menjadi_dua_baris_riwayat(conn, explainer):
+    add_data(conn, {'Nama_Siswa': "Ani", 'NISN': '201', 'Kelas': "X A", 'Nilai_Rata_Rata_Semester': 90.0, 'Jumlah_Absensi': 0,
+                    'Status_Beasiswa': "Tidak", 'Pekerjaan_Orang_Tua': "PNS", 'Riwayat_Pelanggaran': 0})
+    scoring.refresh_scores(conn, explainer, 'uji')
+    for absensi in (29, 0):
+        df_awal = read_data(conn)
+        update_data(conn, df_awal, df_awal.assign(Jumlah_Absensi=absensi, Riwayat_Pelanggaran=99 if absensi else 0))
+        scoring.refresh_scores(conn, explainer, 'uji')
+    df = scoring.read_student_history(conn, '201')
+    assert len(df) == 3 and df['recorded_at'].is_unique
+    assert df['risk_score'].iloc[0] == df['risk_score'].iloc[2] != df['risk_score'].iloc[1]
+
+
+def test_hapus_siswa_mengakhiri_trennya(conn, explainer):
+    for nisn in ('301', '302'):
+        add_data(conn, {'Nama_Siswa': "Siswa", 'NISN': nisn, 'Kelas': "X D", 'Nilai_Rata_Rata_Semester': 80.0, 'Jumlah_Absensi': 1,
+                        'Status_Beasiswa': "Ya", 'Pekerjaan_Orang_Tua': "PNS", 'Riwayat_Pelanggaran': 0})
+    scoring.refresh_scores(conn, explainer, 'uji')
+    conn.execute("UPDATE risk_history SET recorded_at = '2020-05-01 00:00:00.000000', periode = '2020-05'")
+    conn.commit()
+    delete_data(conn, ['302'])
+    df = scoring.read_class_history(conn, "X D").set_index('periode')
+    assert df.loc['2020-05', 'jumlah_siswa'] == 2
+    assert (df.loc['2020-06':, 'jumlah_siswa'] == 1).all()
@@ -0,0 +1,93 @@
+import pytest
+
+import scoring
+from database import add_data, delete_data, read_data, update_data
+
+
+def siswa(nisn, absensi=2, **ubah):
+    return {'Nama_Siswa': f"Siswa {nisn}", 'NISN': nisn, 'Kelas': "X MIPA 1", 'Nilai_Rata_Rata_Semester': 70.0, 'Jumlah_Absensi': absensi,
+            'Status_Beasiswa': "Tidak", 'Pekerjaan_Orang_Tua': "Petani", 'Riwayat_Pelanggaran': 10, **ubah}
+
+
+class ExplainerTercatat:
+    """Membungkus ModelExplainer dan mencatat NISN yang dinilai pada setiap panggilan explain()."""
+
+    def __init__(self, explainer):
+        self.explainer = explainer
+        self.dinilai = []
+
+    def explain(self, df):
+        self.dinilai.append(sorted(df['NISN']))
+        return self.explainer.explain(df)
+
+
+@pytest.fixture
+def tercatat(explainer):
+    return ExplainerTercatat(explainer)
+
+
+@pytest.fixture
+def conn_siswa(conn, tercatat):
+    for nisn in ('001', '002', '003'):
+        add_data(conn, siswa(nisn))
+    assert scoring.refresh_scores(conn, tercatat, 'model-a') == 3
+    tercatat.dinilai.clear()
+    return conn
+
+
+def skor_tersimpan(conn):
+    return {nisn: (skor, versi) for nisn, skor, versi in conn.execute("SELECT NISN, risk_score, row_version FROM risk_score")}
+
+
+def test_skor_sama_dengan_explainer(conn_siswa, explainer):
+    df = read_data(conn_siswa).sort_values('NISN')
+    risiko, _ = explainer.explain(df)
+    assert [skor_tersimpan(conn_siswa)[nisn][0] for nisn in df['NISN']] == pytest.approx(list(risiko))
+
+
+def test_rerun_tanpa_perubahan_tidak_menilai_ulang(conn_siswa, tercatat):
+    assert scoring.refresh_scores(conn_siswa, tercatat, 'model-a') == 0
+    assert tercatat.dinilai == []
+    penanda = conn_siswa.execute("SELECT value FROM app_meta WHERE key = 'skor_terakhir'").fetchone()[0]
+    assert penanda == f"{scoring.get_data_version(conn_siswa)}:model-a"
+
+
+def test_hanya_siswa_yang_diedit_dinilai_ulang(conn_siswa, tercatat):
+    df_awal = read_data(conn_siswa)
+    df_edit = df_awal.copy()
+    df_edit.loc[df_edit['NISN'] == '002', 'Jumlah_Absensi'] = 25
+    update_data(conn_siswa, df_awal, df_edit)
+    assert scoring.refresh_scores(conn_siswa, tercatat, 'model-a') == 1
+    assert tercatat.dinilai == [['002']]
+    assert skor_tersimpan(conn_siswa)['002'][1] == 2
+
+
+def test_siswa_baru_dinilai(conn_siswa, tercatat):
+    add_data(conn_siswa, siswa('004'))
+    assert scoring.refresh_scores(conn_siswa, tercatat, 'model-a') == 1
+    assert tercatat.dinilai == [['004']]
+    assert set(skor_tersimpan(conn_siswa)) == {'001', '002', '003', '004'}
+
+
+def test_hapus_siswa_menghapus_skornya(conn_siswa, tercatat):
+    versi = scoring.get_data_version(conn_siswa)
+    delete_data(conn_siswa, ['003'])
+    assert scoring.get_data_version(conn_siswa) == versi + 1
+    assert set(skor_tersimpan(conn_siswa)) == {'001', '002'}
+    assert conn_siswa.execute("SELECT COUNT(*) FROM data_siswa_versi WHERE NISN = '003'").fetchone()[0] == 0
+    assert scoring.refresh_scores(conn_siswa, tercatat, 'model-a') == 0
+    assert tercatat.dinilai == []
+
+
+def test_model_baru_menilai_ulang_semua_siswa(conn_siswa, tercatat):
+    assert scoring.refresh_scores(conn_siswa, tercatat, 'model-b') == 3
+    assert tercatat.dinilai == [['001', '002', '003']]
+    assert {fp for (fp,) in conn_siswa.execute("SELECT model_fingerprint FROM risk_score")} == {'model-b'}
+    assert scoring.refresh_scores(conn_siswa, tercatat, 'model-b') == 0
+
+
+def test_riwayat_hanya_ditulis_saat_skor_atau_fitur_berubah(conn_siswa, tercatat):
+    assert conn_siswa.execute("SELECT COUNT(*) FROM risk_history").fetchone()[0] == 3
+    # Model baru dengan skor yang sama: skor dihitung ulang tetapi tidak ada baris riwayat baru
+    scoring.refresh_scores(conn_siswa, tercatat, 'model-b')
+    assert conn_siswa.execute("SELECT COUNT(*) FROM risk_history").fetchone()[0] == 3